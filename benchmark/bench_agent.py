@@ -0,0 +1,206 @@
+# End-to-end MCPClient.process benchmark with no network: a scripted fake Gemini,
+# the real httptool SSE servers on localhost and the stdio tools.
+import asyncio
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import argparse
+from collections import defaultdict
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(ROOT, "client"))
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from client import MCPClient
+from fake_gemini import FakeGeminiClient
+from tracing import Tracer
+
+RESULTS_DIR = os.path.join(ROOT, "benchmark", "results")
+
+SCRIPTS = {
+    "add": [
+        {"calls": [{"name": "add_numbers", "args": {"a": 2, "b": 3}}]},
+        {"text": "The sum is 5."}
+    ],
+    "members": [
+        {"calls": [{"name": "vimes_lab_members", "args": {"name": "an"}}, {"name": "random_number", "args": {"command": "go"}}]},
+        {"text": "Here are the members."}
+    ],
+    "shell": [
+        {"calls": [{"name": "run_command", "args": {"command": "echo hello"}}]},
+        {"calls": [{"name": "add_numbers", "args": {"a": 1, "b": 1}}, {"name": "random_number", "args": {"command": "go"}}]},
+        {"text": "Done."}
+    ],
+    "chat": [
+        {"text": "Hello there, nothing to call."}
+    ]
+}
+
+
+def percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("localhost", 0))
+        return sock.getsockname()[1]
+
+
+def make_database(workdir: str, rows: int = 200):
+    os.makedirs(os.path.join(workdir, "db"), exist_ok=True)
+    db = sqlite3.connect(os.path.join(workdir, "db", "vimes.db"))
+    db.execute("CREATE TABLE IF NOT EXISTS members (id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    db.executemany("INSERT INTO members (name) VALUES (?)", [(f"Member {i} Tran Van An",) for i in range(rows)])
+    db.commit()
+    db.close()
+
+
+def start_sse_server(script: str, port: int, workdir: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "httptool", script), "--port", str(port)],
+        cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def wait_for_port(port: int, timeout: float = 20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("localhost", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise TimeoutError(f"Server on port {port} did not start")
+
+
+def spans_summary(trace_path: str, prompts: int):
+    spans = []
+    with open(trace_path, "r") as f:
+        spans = [json.loads(line) for line in f if line.strip()]
+
+    turns = [span for span in spans if span["name"] == "turn"]
+    llm_ms = {span["parent_span_id"]: span["duration_ms"] for span in spans if span["name"] == "llm.generate"}
+    tool_ms = defaultdict(float)
+    tool_latency = defaultdict(list)
+    for span in spans:
+        if span["name"] == "tool.call":
+            tool_latency[span["attributes"].get("tool")].append(span["duration_ms"])
+            tool_ms[span["parent_span_id"]] = max(tool_ms[span["parent_span_id"]], span["duration_ms"])
+
+    # what a turn costs beyond the model call and its slowest tool call
+    overhead = [turn["duration_ms"] - llm_ms.get(turn["span_id"], 0) - tool_ms.get(turn["span_id"], 0) for turn in turns]
+    return {
+        "turns_per_prompt": len(turns) / prompts if prompts else 0,
+        "turn_overhead_ms_p50": percentile(overhead, 0.5),
+        "turn_overhead_ms_p99": percentile(overhead, 0.99),
+        "tool_latency_ms": {
+            tool: {"calls": len(values), "p50": percentile(values, 0.5), "p99": percentile(values, 0.99)}
+            for tool, values in sorted(tool_latency.items())
+        }
+    }
+
+
+async def run(args, workdir: str, command_port: int, database_port: int):
+    trace_path = os.path.join(workdir, "traces.jsonl")
+    config = {
+        "tracing": {"enabled": True, "path": trace_path},
+        "servers": [
+            {"id": "tool_server", "url": f"http://localhost:{command_port}/sse", "max_concurrency": args.concurrency},
+            {"id": "database_server", "url": f"http://localhost:{database_port}/sse", "max_concurrency": args.concurrency},
+            {"id": "number_generator", "command": sys.executable, "args": [os.path.join(ROOT, "tool", "randomnum.py")]}
+        ]
+    }
+    client = MCPClient(config)
+    client.client = FakeGeminiClient(latency=args.llm_latency, jitter=args.llm_jitter, scripts=SCRIPTS)
+    try:
+        await client.connect_to_multiple_servers(config["servers"])
+        keywords = list(SCRIPTS)
+        prompts = [f"{keywords[i % len(keywords)]} #{i}" for i in range(args.prompts)]
+        for prompt in prompts[:len(SCRIPTS)]: # warm up connections
+            await client.process(prompt)
+        client.tracer.close() # only measured prompts go into the spans
+        os.remove(trace_path)
+        client.tracer = Tracer(trace_path)
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        latencies = []
+
+        async def one(prompt: str):
+            async with semaphore:
+                start = time.perf_counter()
+                await client.process(prompt)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one(prompt) for prompt in prompts))
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.cleanup()
+
+    result = {
+        "prompts": len(prompts),
+        "concurrency": args.concurrency,
+        "llm_latency_ms": args.llm_latency * 1000,
+        "prompts_per_sec": len(prompts) / elapsed,
+        "latency_ms_p50": percentile(latencies, 0.5),
+        "latency_ms_p99": percentile(latencies, 0.99)
+    }
+    result.update(spans_summary(trace_path, len(prompts)))
+    return result
+
+
+def compare(result, baseline_path: str):
+    with open(baseline_path, "r") as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path}:")
+    for key in ["prompts_per_sec", "latency_ms_p50", "latency_ms_p99", "turn_overhead_ms_p50", "turn_overhead_ms_p99"]:
+        old, new = baseline.get(key), result.get(key)
+        if old:
+            print(f"  {key:<22} {old:>10.2f} -> {new:>10.2f} ({(new - old) / old:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline end-to-end benchmark of MCPClient.process')
+    parser.add_argument('-n', '--prompts', type=int, default=200, help='Prompts to run')
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help='Prompts in flight')
+    parser.add_argument('--llm-latency', type=float, default=0.05, help='Fake model latency in seconds')
+    parser.add_argument('--llm-jitter', type=float, default=0.0, help='Random +/- added to the model latency')
+    parser.add_argument('--name', default='agent', help='Name of the saved result file')
+    parser.add_argument('--compare', help='Earlier result file to compare against')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        make_database(workdir)
+        command_port, database_port = free_port(), free_port()
+        servers = [start_sse_server("sse_command.py", command_port, workdir),
+                   start_sse_server("sse_database.py", database_port, workdir)]
+        try:
+            wait_for_port(command_port)
+            wait_for_port(database_port)
+            result = asyncio.run(run(args, workdir, command_port, database_port))
+        finally:
+            for server in servers:
+                server.terminate()
+                server.wait()
+
+    print("\n" + "=" * 50)
+    print(json.dumps(result, indent=2))
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, f"{args.name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"Saved {path}")
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# vimes_lab_members under concurrent load: a connection per call against the shared pool.
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import argparse
+
+import aiosqlite
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(ROOT, "httptool"))
+
+from db_pool import ConnectionPool
+
+QUERY = "SELECT name FROM members WHERE name LIKE ? COLLATE NOCASE"
+NAMES = ["an", "minh", "linh", "tran", "x"]
+
+
+def create_db(path: str, rows: int):
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE members(id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    first = ["An", "Binh", "Chi", "Dung", "Hanh", "Linh", "Minh", "Nam", "Phuong", "Tran"]
+    last = ["Nguyen", "Tran", "Le", "Pham", "Hoang", "Vu", "Dang", "Bui", "Do", "Ngo"]
+    db.executemany("INSERT INTO members(name) VALUES (?)",
+                   ((f"{first[i % 10]} {last[i // 10 % 10]} {i}",) for i in range(rows)))
+    db.commit()
+    db.close()
+
+
+async def per_call(path: str, name: str):
+    async with aiosqlite.connect(path) as db:
+        cursor = await db.execute(QUERY, (f"%{name}%",))
+        return await cursor.fetchall()
+
+
+async def measure(label: str, lookup, n: int, concurrency: int):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            await lookup(NAMES[i % len(NAMES)])
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{label:<10} {n / elapsed:8.1f} lookups/s   p50 {latencies[len(latencies) // 2] * 1000:6.2f} ms   "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f} ms")
+
+
+async def main(rows: int, n: int, concurrency: int, pool_size: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vimes.db")
+        create_db(path, rows)
+        print(f"{rows} members, {n} lookups, concurrency {concurrency}")
+
+        await measure("per-call", lambda name: per_call(path, name), n, concurrency)
+
+        pool = ConnectionPool(path, pool_size)
+        await pool.open()
+
+        async def pooled(name: str):
+            async with pool.acquire() as db:
+                cursor = await db.execute(QUERY, (f"%{name}%",))
+                return await cursor.fetchall()
+
+        await measure(f"pool({pool_size})", pooled, n, concurrency)
+        await pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark members lookups")
+    parser.add_argument("--rows", type=int, default=1000, help="Synthetic members to create")
+    parser.add_argument("-n", type=int, default=2000, help="Lookups to run")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="Concurrent lookups")
+    parser.add_argument("--pool-size", type=int, default=4, help="Connections in the pool")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.n, args.concurrency, args.pool_size))
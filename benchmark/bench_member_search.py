@@ -0,0 +1,85 @@
+# Member search on a synthetic 1M row table: LIKE '%name%' scan against the members_fts trigram index.
+import asyncio
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(ROOT, "httptool"))
+
+from db_pool import ConnectionPool
+from sse_database import create_search_index, search_members
+
+LIKE_QUERY = "SELECT name FROM members WHERE name LIKE ? COLLATE NOCASE"
+FIRST = ["An", "Binh", "Chi", "Dung", "Giang", "Hanh", "Khoa", "Linh", "Minh", "Nam", "Phuong", "Quang", "Thao", "Tuan", "Vy"]
+LAST = ["Nguyen", "Tran", "Le", "Pham", "Hoang", "Huynh", "Vu", "Vo", "Dang", "Bui", "Do", "Ho", "Ngo", "Duong", "Ly"]
+QUERIES = ["nguyen", "phuong", "uan bu", "ly 4242", "zzz", "an", "ng"]
+
+
+def create_db(path: str, rows: int):
+    rng = random.Random(0)
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE members(id INTEGER PRIMARY KEY, name TEXT NOT NULL)")
+    db.executemany("INSERT INTO members(name) VALUES (?)",
+                   ((f"{rng.choice(FIRST)} {rng.choice(LAST)} {rng.choice(FIRST)} {i}",) for i in range(rows)))
+    db.commit()
+    db.close()
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+async def main(rows: int, limit: int, repeat: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "vimes.db")
+        start = time.perf_counter()
+        create_db(path, rows)
+        print(f"created {rows} members in {time.perf_counter() - start:.1f}s")
+
+        pool = ConnectionPool(path, 1, setup=create_search_index)
+        start = time.perf_counter()
+        await pool.open()
+        print(f"built the trigram index in {time.perf_counter() - start:.1f}s, "
+              f"database is {os.path.getsize(path) / 1e6:.0f} MB")
+
+        plain = sqlite3.connect(path)
+        print(f"\n{'query':<10} {'LIKE scan':>12} {'search':>12} {'matches':>9}  (limit {limit})")
+        async with pool.acquire() as db:
+            for query in QUERIES:
+                matches = len(plain.execute(LIKE_QUERY, (f"%{query}%",)).fetchall())
+                scan = timed(lambda: plain.execute(LIKE_QUERY + " LIMIT ?", (f"%{query}%", limit)).fetchall(), repeat)
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    await search_members(db, query, limit)
+                search = (time.perf_counter() - start) / repeat * 1000
+                print(f"{query!r:<10} {scan:9.2f} ms {search:9.2f} ms {matches:9}")
+
+            # the triggers keep the index in sync with writes
+            start = time.perf_counter()
+            await db.executemany("INSERT INTO members(name) VALUES (?)", ((f"Benchmark Writer {i}",) for i in range(1000)))
+            await db.execute("UPDATE members SET name = 'Renamed Member' WHERE id = 1")
+            await db.execute("DELETE FROM members WHERE id = 2")
+            await db.commit()
+            print(f"\n1000 inserts + update + delete with triggers: {(time.perf_counter() - start) * 1000:.1f} ms")
+            print("found after write:", (await search_members(db, "benchmark writer 99", 1)),
+                  await search_members(db, "renamed", 1))
+        plain.close()
+        await pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark member search")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic members to create")
+    parser.add_argument("--limit", type=int, default=20, help="Results per search")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.rows, args.limit, args.repeat))
@@ -0,0 +1,102 @@
+# ReAct on multi-step prompts: the old one-action-per-turn sync loop against ReActEngine,
+# with a scripted model that issues every independent action at once when the prompt allows it.
+import asyncio
+import os
+import re
+import sys
+import time
+import argparse
+from types import SimpleNamespace
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(ROOT, "client"))
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from reAct import ReActEngine, run_calculator
+
+QUERIES = [
+    "Tính tổng: sqrt(16), 4 / 2, 3 * 7",
+    "Tính tổng: 2^10, sin(pi / 2), log10(1000), 17 % 5, 6 * 7",
+    "Tính tổng: factorial(5), 100 - 58, sqrt(81), 3^4, 12 / 4, 2 * pi"
+]
+LEGACY_PROMPT = "Mỗi lượt chỉ một Action: <calculator>biểu thức</calculator>"
+
+
+class ScriptedReActModel:
+    """Finishes 'Tính tổng: a, b, c' by computing each term, then their sum, then answering."""
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def reply(self, contents, config) -> SimpleNamespace:
+        self.calls += 1
+        query = contents[0].parts[0].text
+        terms = query.split(":", 1)[1].split(", ")
+        observed = [value for content in contents[1:] if content.role == "user"
+                    for value in re.findall(r"Observation(?: \d+)?: (\S+)", content.parts[0].text)]
+        parallel = "một hoặc nhiều Action" in config.system_instruction[0].text
+        if len(observed) < len(terms):
+            remaining = terms[len(observed):]
+            actions = remaining if parallel else remaining[:1]
+            text = "Thought: tính tiếp\n" + "\n".join(f"Action: <calculator>{term}</calculator>" for term in actions)
+        elif len(observed) == len(terms):
+            text = f"Thought: cộng lại\nAction: <calculator>{' + '.join(observed)}</calculator>"
+        else:
+            text = f"Thought: xong\nAnswer: {observed[-1]}"
+        return SimpleNamespace(text=text)
+
+    def generate_content(self, model, contents, config=None):
+        time.sleep(self.latency)
+        return self.reply(contents, config)
+
+    async def generate_content_async(self, model, contents, config=None):
+        await asyncio.sleep(self.latency)
+        return self.reply(contents, config)
+
+
+def legacy_loop(model: ScriptedReActModel, user_query: str) -> str:
+    # client/reAct.py before the engine: sync calls, first <calculator> of each reply, one observation per turn
+    from google.genai import types
+    config = types.GenerateContentConfig(system_instruction=[types.Part.from_text(text=LEGACY_PROMPT)])
+    contents = [types.Content(role="user", parts=[types.Part.from_text(text=user_query)])]
+    while True:
+        model_reply = model.generate_content("fake", contents, config).text
+        contents.append(types.Content(role="model", parts=[types.Part.from_text(text=model_reply)]))
+        if "Answer:" in model_reply:
+            return model_reply.split("Answer:", 1)[1].strip()
+        match = re.search(r"<calculator>(.*?)</calculator>", model_reply, re.DOTALL)
+        observation = run_calculator(match.group(1).strip())
+        contents.append(types.Content(role="user", parts=[types.Part.from_text(text=f"Observation: {observation}")]))
+
+
+async def main(latency: float):
+    print(f"model latency {latency * 1000:.0f} ms per call\n")
+    print(f"{'terms':>5}  {'legacy calls':>12} {'legacy s':>9}  {'engine calls':>12} {'engine s':>9}  answer")
+    totals = [0, 0.0, 0, 0.0]
+    for query in QUERIES:
+        legacy_model = ScriptedReActModel(latency)
+        start = time.perf_counter()
+        legacy_answer = legacy_loop(legacy_model, query)
+        legacy_time = time.perf_counter() - start
+
+        engine_model = ScriptedReActModel(latency)
+        client = SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content=engine_model.generate_content_async)))
+        engine = ReActEngine(client, verbose=False)
+        start = time.perf_counter()
+        answer = await engine.run(query)
+        engine_time = time.perf_counter() - start
+
+        assert answer == legacy_answer, (answer, legacy_answer)
+        terms = len(query.split(", "))
+        print(f"{terms:>5}  {legacy_model.calls:>12} {legacy_time:>9.2f}  {engine.llm_calls:>12} {engine_time:>9.2f}  {answer}")
+        for i, value in enumerate([legacy_model.calls, legacy_time, engine.llm_calls, engine_time]):
+            totals[i] += value
+    print(f"{'all':>5}  {totals[0]:>12} {totals[1]:>9.2f}  {totals[2]:>12} {totals[3]:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the ReAct engine")
+    parser.add_argument("--latency", type=float, default=0.3, help="Seconds per simulated model call")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.latency))
@@ -0,0 +1,68 @@
+# run_command throughput: a fresh shell per call against the warm bash worker pool.
+import asyncio
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(ROOT, "httptool"))
+
+from shell_pool import ShellPool
+
+COMMANDS = ["echo hello", "pwd", "ls", "cat /etc/hostname", "date +%s"]
+
+
+async def run_forked(command: str) -> int:
+    process = await asyncio.create_subprocess_shell(
+        command,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    await process.communicate()
+    return process.returncode
+
+
+async def measure(label: str, run, n: int, concurrency: int):
+    latencies = []
+    queue = asyncio.Queue()
+    for i in range(n):
+        queue.put_nowait(COMMANDS[i % len(COMMANDS)])
+
+    async def worker():
+        while not queue.empty():
+            command = queue.get_nowait()
+            start = time.perf_counter()
+            await run(command)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(f"{label:<8} {n / elapsed:8.1f} cmd/s   p50 {latencies[len(latencies) // 2] * 1000:6.2f} ms   "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f} ms")
+
+
+async def main(n: int, concurrency: int, max_uses: int):
+    if not ShellPool.supported():
+        print("bash not found, the pool is unavailable here")
+        return
+    pool = ShellPool(size=concurrency, max_uses=max_uses)
+    await pool.run("true") # first worker's startup is not part of steady state
+    print(f"{n} commands, concurrency {concurrency}")
+    await measure("fork", run_forked, n, concurrency)
+    await measure("pool", lambda command: pool.run(command, session_key=str(id(asyncio.current_task()))), n, concurrency)
+    print(f"workers recycled: {pool.recycled}")
+    await pool.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the shell worker pool")
+    parser.add_argument("-n", type=int, default=1000, help="Commands to run")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Concurrent commands, also the pool size")
+    parser.add_argument("--max-uses", type=int, default=500, help="Commands before a worker is recycled")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.n, args.concurrency, args.max_uses))
@@ -0,0 +1,106 @@
+# Per-call latency and TCP connections of SSE against streamable HTTP, through MCPClient,
+# on a local httptool/sse_command.py (which serves both /sse and /mcp).
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import argparse
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(ROOT, "client"))
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from client import MCPClient
+from bench_agent import free_port, percentile, wait_for_port
+
+
+def open_connections(port: int) -> int:
+    # established client-side sockets to the server port, from /proc/net/tcp{,6}
+    count = 0
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        if not os.path.exists(table):
+            return -1
+        with open(table) as f:
+            for line in f.readlines()[1:]:
+                fields = line.split()
+                if int(fields[2].split(":")[1], 16) == port and fields[3] == "01":
+                    count += 1
+    return count
+
+
+async def measure(transport: str, port: int, calls: int, concurrency: int) -> dict:
+    url = f"http://localhost:{port}/{'mcp' if transport == 'streamable_http' else 'sse'}"
+    client = MCPClient({"servers": []})
+    start = time.perf_counter()
+    await client.connect_to_server({"url": url, "transport": transport, "max_concurrency": concurrency}, "bench")
+    connect_ms = (time.perf_counter() - start) * 1000
+    session = client.sessions["bench"]
+    idle_connections = open_connections(port)
+
+    sequential = []
+    for i in range(calls):
+        start = time.perf_counter()
+        await session.call_tool("add_numbers", {"a": i, "b": 1})
+        sequential.append((time.perf_counter() - start) * 1000)
+
+    peak = 0
+    async def one(i: int):
+        nonlocal peak
+        await session.call_tool("add_numbers", {"a": i, "b": 1})
+        peak = max(peak, open_connections(port))
+
+    semaphore = asyncio.Semaphore(concurrency)
+    async def bounded(i: int):
+        async with semaphore:
+            await one(i)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(bounded(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    await client.cleanup()
+    return {
+        "connect_ms": connect_ms,
+        "p50_ms": percentile(sequential, 0.5),
+        "p99_ms": percentile(sequential, 0.99),
+        "calls_per_s": calls / elapsed,
+        "idle_connections": idle_connections,
+        "peak_connections": peak
+    }
+
+
+async def run(port: int, calls: int, concurrency: int):
+    print(f"{calls} add_numbers calls sequentially, then {concurrency} at a time\n")
+    print(f"{'transport':<16} {'connect':>9} {'p50':>8} {'p99':>8} {'calls/s':>9} {'conns idle':>11} {'conns peak':>11}")
+    for transport in ("sse", "streamable_http"):
+        r = await measure(transport, port, calls, concurrency)
+        print(f"{transport:<16} {r['connect_ms']:7.1f}ms {r['p50_ms']:6.2f}ms {r['p99_ms']:6.2f}ms {r['calls_per_s']:9.1f} "
+              f"{r['idle_connections']:>11} {r['peak_connections']:>11}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SSE against streamable HTTP")
+    parser.add_argument("-n", "--calls", type=int, default=500, help="Tool calls per transport")
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="Calls in flight in the concurrent phase")
+    parser.add_argument("--stateless", action="store_true", help="Run the server with MCP_HTTP_STATELESS=1")
+    parser.add_argument("--json", action="store_true", help="Run the server with MCP_HTTP_JSON_RESPONSE=1")
+    args = parser.parse_args()
+
+    port = free_port()
+    env = {**os.environ, "MCP_HTTP_STATELESS": "1" if args.stateless else "0", "MCP_HTTP_JSON_RESPONSE": "1" if args.json else "0"}
+    with tempfile.TemporaryDirectory() as workdir:
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "httptool", "sse_command.py"), "--port", str(port)],
+            cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_for_port(port)
+            asyncio.run(run(port, args.calls, args.concurrency))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# Tool-call throughput of httptool/sse_command.py: one process against --workers N behind the router,
+# with many SSE sessions calling add_numbers at once.
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import argparse
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.join(ROOT, "httptool"))
+
+from sse_router import free_port, wait_for_port
+
+
+async def session_load(url: str, calls: int) -> int:
+    async with sse_client(url) as streams:
+        async with ClientSession(*streams) as session:
+            await session.initialize()
+            for i in range(calls):
+                await session.call_tool("add_numbers", {"a": i, "b": 1})
+    return calls
+
+
+async def measure(port: int, sessions: int, calls: int) -> float:
+    start = time.perf_counter()
+    total = sum(await asyncio.gather(*(session_load(f"http://localhost:{port}/sse", calls) for _ in range(sessions))))
+    return total / (time.perf_counter() - start)
+
+
+def run(workers: int, sessions: int, calls: int) -> float:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as workdir:
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "httptool", "sse_command.py"), "--port", str(port), "--workers", str(workers)],
+            cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        try:
+            wait_for_port(port)
+            time.sleep(1 if workers == 1 else 3) # the router starts its workers in its lifespan
+            return asyncio.run(measure(port, sessions, calls))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sse_command with several workers")
+    parser.add_argument("-w", "--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to try")
+    parser.add_argument("-s", "--sessions", type=int, default=16, help="Concurrent SSE sessions")
+    parser.add_argument("-n", "--calls", type=int, default=20, help="Calls per session")
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.calls} add_numbers calls, {os.cpu_count()} cores\n")
+    baseline = None
+    for workers in args.workers:
+        rate = run(workers, args.sessions, args.calls)
+        baseline = baseline or rate
+        label = "1 (no router)" if workers == 1 else str(workers)
+        print(f"workers {label:<14} {rate:8.1f} calls/s   x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# N concurrent MCPClient.process calls on one loop should take about as long as one
+import asyncio
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "client"))
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from client import MCPClient
+from fake_gemini import FakeGeminiClient
+
+
+async def timed(coro) -> float:
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+async def main(concurrency: int, latency: float):
+    client = MCPClient()
+    client.client = FakeGeminiClient(latency=latency)
+
+    single = await timed(client.process("Say hi"))
+    batch = await timed(asyncio.gather(*(client.process(f"Say hi #{i}") for i in range(concurrency))))
+
+    print("\n" + "=" * 50)
+    print(f"model latency:         {latency:.3f}s")
+    print(f"1 prompt:              {single:.3f}s")
+    print(f"{concurrency} concurrent prompts: {batch:.3f}s ({batch / single:.2f}x of one)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark concurrent process() calls')
+    parser.add_argument('-n', '--concurrency', type=int, default=20, help='Prompts to run at once')
+    parser.add_argument('--latency', type=float, default=0.5, help='Fake model latency in seconds')
+    args = parser.parse_args()
+
+    asyncio.run(main(args.concurrency, args.latency))
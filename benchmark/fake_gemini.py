@@ -0,0 +1,91 @@
+import asyncio
+import random
+from typing import Dict, List, Optional
+from google.genai import types
+
+# A script is the list of model turns for one prompt. Each turn is either
+# {"text": "..."} or {"calls": [{"name": "tool", "args": {...}}, ...]}.
+
+
+def text_response(text: str, usage: Optional[types.GenerateContentResponseUsageMetadata] = None) -> types.GenerateContentResponse:
+    return parts_response([types.Part.from_text(text=text)], usage)
+
+
+def parts_response(parts: List[types.Part], usage: Optional[types.GenerateContentResponseUsageMetadata] = None) -> types.GenerateContentResponse:
+    return types.GenerateContentResponse(
+        candidates=[types.Candidate(content=types.Content(role="model", parts=parts))],
+        usage_metadata=usage
+    )
+
+
+def prompt_and_turn(contents: List[types.Content]):
+    # the prompt is the last user text; the turn is how many model replies followed it
+    for index in range(len(contents) - 1, -1, -1):
+        content = contents[index]
+        if content.role == 'user' and content.parts and content.parts[0].text:
+            replies = sum(1 for later in contents[index + 1:] if later.role in ('assistant', 'model'))
+            return content.parts[0].text, replies
+    return "", 0
+
+
+class FakeModels:
+    def __init__(self, latency: float, reply: str, scripts: Optional[Dict[str, List[Dict]]] = None, jitter: float = 0.0):
+        self.latency = latency
+        self.reply = reply
+        self.scripts = scripts or {}
+        self.jitter = jitter
+        self.calls = 0
+
+    def next_turn(self, contents) -> Dict:
+        prompt, turn = prompt_and_turn(contents)
+        for keyword, script in self.scripts.items():
+            if keyword in prompt:
+                return script[min(turn, len(script) - 1)]
+        return {"text": self.reply}
+
+    def usage(self, contents) -> types.GenerateContentResponseUsageMetadata:
+        prompt_tokens = sum(len(content.model_dump_json(exclude_none=True)) for content in contents) // 4
+        return types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens, candidates_token_count=8, total_token_count=prompt_tokens + 8
+        )
+
+    def delay(self) -> float:
+        return max(self.latency + random.uniform(-self.jitter, self.jitter), 0)
+
+    async def generate_content(self, model, contents, config=None):
+        self.calls += 1
+        await asyncio.sleep(self.delay())
+        turn = self.next_turn(contents)
+        if "calls" in turn:
+            parts = [types.Part.from_function_call(name=call["name"], args=call.get("args", {})) for call in turn["calls"]]
+            return parts_response(parts, self.usage(contents))
+        return text_response(turn["text"], self.usage(contents))
+
+    async def generate_content_stream(self, model, contents, config=None):
+        self.calls += 1
+        turn = self.next_turn(contents)
+        delay = self.delay()
+
+        async def chunks():
+            if "calls" in turn:
+                await asyncio.sleep(delay)
+                parts = [types.Part.from_function_call(name=call["name"], args=call.get("args", {})) for call in turn["calls"]]
+                yield parts_response(parts, self.usage(contents))
+                return
+            words = turn["text"].split(" ")
+            for i, word in enumerate(words):
+                await asyncio.sleep(delay / len(words))
+                yield text_response(word if i == 0 else " " + word, self.usage(contents) if i == len(words) - 1 else None)
+        return chunks()
+
+
+class FakeAio:
+    def __init__(self, models: FakeModels):
+        self.models = models
+
+
+class FakeGeminiClient:
+    """Stand-in for genai.Client: only the async surface, replaying scripted turns after a configurable latency."""
+    def __init__(self, latency: float = 0.5, reply: str = "Done.", scripts: Optional[Dict[str, List[Dict]]] = None,
+                 jitter: float = 0.0):
+        self.aio = FakeAio(FakeModels(latency, reply, scripts, jitter))
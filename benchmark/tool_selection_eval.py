@@ -0,0 +1,171 @@
+# Measures how well the local tool index picks tools, and how much request payload it saves.
+# Offline by default; --live also sends each prompt to Gemini with all tools vs the selected subset.
+import asyncio
+import importlib.util
+import json
+import os
+import sys
+import time
+import argparse
+from statistics import mean
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for directory in ("client", "httptool", "tool"): # the server modules import their siblings by bare name
+    sys.path.insert(0, os.path.join(ROOT, directory))
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+from mcp.types import Tool as MCPTool
+from google.genai import types
+from client import MODEL, SYSTEM_PROMPT, convert_mcp_tools_to_gemini, gemini_api_key
+from tool_index import ToolIndex
+
+SERVER_MODULES = [
+    "httptool/sse_command.py",
+    "httptool/sse_database.py",
+    "tool/calculator.py",
+    "tool/randomnum.py"
+]
+
+# Supabase MCP server stand-ins, so the index is measured against a realistic tool count
+SUPABASE_TOOLS = {
+    "list_organizations": ("Lists all organizations that the user is a member of.", []),
+    "get_organization": ("Gets details for an organization, including subscription plan.", ["id"]),
+    "list_projects": ("Lists all Supabase projects for the user.", []),
+    "get_project": ("Gets details for a Supabase project.", ["id"]),
+    "get_cost": ("Gets the cost of creating a new project or branch.", ["type", "organization_id"]),
+    "confirm_cost": ("Ask the user to confirm their understanding of the cost of creating a new project or branch.", ["type", "recurrence", "amount"]),
+    "create_project": ("Creates a new Supabase project in an organization and region.", ["name", "region", "organization_id", "confirm_cost_id"]),
+    "pause_project": ("Pauses a Supabase project.", ["project_id"]),
+    "restore_project": ("Restores a paused Supabase project.", ["project_id"]),
+    "list_tables": ("Lists all tables in one or more schemas of the project database.", ["project_id", "schemas"]),
+    "list_extensions": ("Lists all Postgres extensions in the database.", ["project_id"]),
+    "list_migrations": ("Lists all migrations in the database.", ["project_id"]),
+    "apply_migration": ("Applies a DDL migration to the database, tracked by name.", ["project_id", "name", "query"]),
+    "execute_sql": ("Executes raw SQL in the Postgres database. Use apply_migration for DDL.", ["project_id", "query"]),
+    "get_logs": ("Gets logs for a project by service type: api, postgres, edge functions, auth, storage, realtime.", ["project_id", "service"]),
+    "get_advisors": ("Gets security or performance advisory notices for the project.", ["project_id", "type"]),
+    "get_project_url": ("Gets the API URL for a project.", ["project_id"]),
+    "get_anon_key": ("Gets the anonymous API key for a project.", ["project_id"]),
+    "generate_typescript_types": ("Generates TypeScript types for a project.", ["project_id"]),
+    "search_docs": ("Search the Supabase documentation using GraphQL.", ["graphql_query"]),
+    "list_edge_functions": ("Lists all Edge Functions in a Supabase project.", ["project_id"]),
+    "deploy_edge_function": ("Deploys an Edge Function to a Supabase project.", ["project_id", "name", "entrypoint_path", "files"]),
+    "create_branch": ("Creates a development branch on a Supabase project.", ["project_id", "name", "confirm_cost_id"]),
+    "list_branches": ("Lists all development branches of a Supabase project.", ["project_id"]),
+    "delete_branch": ("Deletes a development branch.", ["branch_id"]),
+    "merge_branch": ("Merges migrations and edge functions from a development branch to production.", ["branch_id"]),
+    "reset_branch": ("Resets migrations of a development branch.", ["branch_id", "migration_version"]),
+    "rebase_branch": ("Rebases a development branch on production.", ["branch_id"])
+}
+
+# prompt -> tools a correct answer needs
+LABELLED_PROMPTS = [
+    ("List the files in the current directory", ["run_command"]),
+    ("What python version is installed?", ["run_command"]),
+    ("Run the test script with pytest", ["run_command"]),
+    ("Add 41.5 and 0.5", ["add_numbers"]),
+    ("What is the sum of 12 and 30?", ["add_numbers"]),
+    ("Is there a lab member called Minh?", ["vimes_lab_members"]),
+    ("Show me every member of the Vimes lab", ["vimes_lab_members"]),
+    ("Calculate sqrt(144) * 3 with the AI calculator", ["ai_calculator"]),
+    ("Evaluate the expression 2^10 - 24", ["ai_calculator"]),
+    ("Give me a random number", ["random_number"]),
+    ("Which tables exist in my Supabase project?", ["list_tables"]),
+    ("Run this SQL query on the project database: select count(*) from users", ["execute_sql"]),
+    ("Show the postgres logs for project abc", ["get_logs"]),
+    ("Create a development branch called feature-x", ["create_branch"]),
+    ("Deploy the hello edge function", ["deploy_edge_function"]),
+    ("What is the anon key for my project?", ["get_anon_key"]),
+    ("List my Supabase projects", ["list_projects"]),
+    ("Find lab members named Anh and add 2 and 3", ["vimes_lab_members", "add_numbers"]),
+    ("Echo hello and give me a random number", ["run_command", "random_number"])
+]
+
+
+def load_module(path: str):
+    name = "bench_" + os.path.splitext(os.path.basename(path))[0]
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def load_tools():
+    tools = []
+    for path in SERVER_MODULES:
+        tools.extend(await load_module(path).mcp.list_tools())
+    for name, (description, params) in SUPABASE_TOOLS.items():
+        properties = {param: {"type": "string"} for param in params}
+        tools.append(MCPTool(name=name, description=description, inputSchema={"type": "object", "properties": properties}))
+    return tools
+
+
+def payload_bytes(declarations) -> int:
+    return sum(len(tool.model_dump_json(exclude_none=True)) for tool in declarations)
+
+
+async def live_call(client, prompt: str, declarations):
+    start = time.perf_counter()
+    response = await client.aio.models.generate_content(
+        model=MODEL,
+        contents=prompt,
+        config=types.GenerateContentConfig(system_instruction=SYSTEM_PROMPT, tools=declarations)
+    )
+    elapsed = time.perf_counter() - start
+    parts = response.candidates[0].content.parts or [] if response.candidates else []
+    return elapsed, {part.function_call.name for part in parts if part.function_call}
+
+
+async def main(top_k: int, live: bool):
+    tools = await load_tools()
+    declarations = dict(zip([tool.name for tool in tools], convert_mcp_tools_to_gemini(tools)))
+    index = ToolIndex()
+    for tool in tools:
+        index.add(tool)
+
+    full_bytes = payload_bytes(declarations.values())
+    rows = []
+    gemini = None
+    if live:
+        from google import genai
+        gemini = genai.Client(api_key=gemini_api_key)
+
+    for prompt, expected in LABELLED_PROMPTS:
+        start = time.perf_counter()
+        selected = index.select(prompt, top_k) or set(declarations)
+        select_ms = (time.perf_counter() - start) * 1000
+        subset = [declarations[name] for name in declarations if name in selected]
+        row = {
+            "prompt": prompt,
+            "recall": len(set(expected) & selected) / len(expected),
+            "tools": len(subset),
+            "bytes": payload_bytes(subset),
+            "select_ms": select_ms
+        }
+        if gemini:
+            row["full_latency"], full_called = await live_call(gemini, prompt, list(declarations.values()))
+            row["subset_latency"], subset_called = await live_call(gemini, prompt, subset)
+            row["full_correct"] = set(expected) <= full_called
+            row["subset_correct"] = set(expected) <= subset_called
+        rows.append(row)
+        print(f"{row['recall']:.2f}  {row['tools']:>3} tools  {prompt}")
+
+    print("\n" + "=" * 50)
+    print(f"tools indexed:        {len(declarations)} ({full_bytes} bytes of declarations)")
+    print(f"top_k:                {top_k}")
+    print(f"recall of needed tools: {mean(row['recall'] for row in rows):.3f}")
+    print(f"mean tools sent:      {mean(row['tools'] for row in rows):.1f}")
+    print(f"mean payload:         {mean(row['bytes'] for row in rows):.0f} bytes ({mean(row['bytes'] for row in rows) / full_bytes:.0%} of full)")
+    print(f"mean selection time:  {mean(row['select_ms'] for row in rows):.3f} ms")
+    if gemini:
+        print(f"model latency:        full {mean(row['full_latency'] for row in rows):.3f}s, subset {mean(row['subset_latency'] for row in rows):.3f}s")
+        print(f"tool choice accuracy: full {mean(row['full_correct'] for row in rows):.2f}, subset {mean(row['subset_correct'] for row in rows):.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Evaluate per-prompt tool selection')
+    parser.add_argument('--top-k', type=int, default=10, help='Tools selected per prompt')
+    parser.add_argument('--live', action='store_true', help='Also compare model latency and tool choice on Gemini')
+    args = parser.parse_args()
+
+    asyncio.run(main(args.top_k, args.live))
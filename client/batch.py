@@ -0,0 +1,130 @@
+import asyncio
+import json
+import os
+import time
+import argparse
+from typing import Dict, Optional, Set
+from client import MCPClient, load_config
+
+
+def done_ids(output_path: str) -> Set[str]:
+    # ids already written by an earlier run, so a restarted batch picks up where it stopped
+    ids = set()
+    if not os.path.exists(output_path):
+        return ids
+    with open(output_path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError: # a line cut short by a crash is retried
+                continue
+            if "error" not in record:
+                ids.add(str(record["id"]))
+    return ids
+
+
+def read_prompt(record: Dict, prompt_field: str) -> Optional[str]:
+    if prompt_field in record:
+        return record[prompt_field]
+    if "body" in record: # requests.jsonl style
+        return "\n\n".join(str(record[key]) for key in ["title", "body"] if record.get(key))
+    return None
+
+
+async def run_one(client: MCPClient, prompt: str) -> Dict:
+    start = time.perf_counter()
+    result = {"response": None, "turns": 0}
+    async for event in client.process_stream(prompt, stream=False):
+        if event["type"] == "done":
+            result["response"] = event["text"]
+            result["turns"] = event["turns"]
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+async def run_batch(client: MCPClient, input_path: str, output_path: str, concurrency: int,
+                    id_field: str = "id", prompt_field: str = "prompt"):
+    skip = done_ids(output_path)
+    if skip:
+        print(f"Resuming: {len(skip)} prompts already done")
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2) # the reader never runs far ahead of the workers
+    counts = {"done": 0, "failed": 0, "skipped": 0}
+    start = time.perf_counter()
+
+    with open(output_path, "a") as output:
+        def write(record: Dict):
+            output.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            output.flush()
+
+        async def worker():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                record_id, prompt = item
+                try:
+                    result = await run_one(client, prompt)
+                    write({"id": record_id, **result})
+                    counts["done"] += 1
+                except Exception as e:
+                    write({"id": record_id, "error": str(e)})
+                    counts["failed"] += 1
+                finished = counts["done"] + counts["failed"]
+                if finished % 100 == 0:
+                    print(f"[batch] {finished} finished, {finished / (time.perf_counter() - start):.1f} prompts/sec")
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        with open(input_path, "r") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    if not isinstance(record, dict):
+                        raise ValueError("not a JSON object")
+                except ValueError as e: # one bad line fails only itself
+                    write({"id": str(line_number), "error": f"Invalid JSON on line {line_number}: {e}"})
+                    counts["failed"] += 1
+                    continue
+                record_id = str(record.get(id_field, record.get("request_id", line_number)))
+                prompt = read_prompt(record, prompt_field)
+                if record_id in skip:
+                    counts["skipped"] += 1
+                    continue
+                if prompt is None:
+                    write({"id": record_id, "error": f"No '{prompt_field}' field on line {line_number}"})
+                    counts["failed"] += 1
+                    continue
+                await queue.put((record_id, prompt))
+
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+
+    elapsed = time.perf_counter() - start
+    print(f"\nBatch finished in {elapsed:.1f}s: {counts['done']} done, {counts['failed']} failed, {counts['skipped']} skipped")
+    return counts
+
+
+async def main():
+    parser = argparse.ArgumentParser(description='Run a JSONL file of prompts through the agent')
+    parser.add_argument('input', help='JSONL file, one prompt per line')
+    parser.add_argument('output', help='JSONL results file, appended to and used to resume')
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help='Prompts in flight')
+    parser.add_argument('--id-field', default='id', help='Field holding the prompt id (falls back to request_id, then line number)')
+    parser.add_argument('--prompt-field', default='prompt', help='Field holding the prompt text')
+    parser.add_argument('--config', default='config.json', help='Path to config.json')
+    args = parser.parse_args()
+
+    config_data = load_config(args.config)
+    client = MCPClient(config_data)
+    try:
+        await client.connect_to_multiple_servers(config_data.get("servers", []))
+        await run_batch(client, args.input, args.output, args.concurrency, args.id_field, args.prompt_field)
+    finally:
+        await client.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,31 +1,82 @@
 import asyncio
 import os
 import json
+import time
 import subprocess
-from typing import Dict, List, Optional
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, List, Optional
 from mcp import ClientSession
 from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
 from mcp.client.stdio import StdioServerParameters, stdio_client
 from google import genai
 from google.genai import types
 from google.genai.types import Tool, FunctionDeclaration
 from google.genai.types import GenerateContentConfig
 from dotenv import load_dotenv
+from tool_cache import ToolResultCache
+from history import ConversationHistory, estimate_tokens
+from tool_index import ToolIndex
+from manifest_cache import ManifestCache
+from supervisor import ConnectionSupervisor
+from tracing import Tracer
+from replay import wrap_client
+from ratelimit import RateLimiter
 
 
 load_dotenv()
 gemini_api_key = os.getenv("GEMINI_API_KEY")
+DEFAULT_MAX_CONCURRENCY = 4 # in-flight tool calls per server
+MODEL = "gemini-2.0-flash-001"
+SYSTEM_PROMPT = """
+You are a smart assistant with access to tools on multiple servers.
+
+You have a limit of **Turn**(either text, function call or both) per task. Plan carefully.
+
+Your job:
+1. Understand the user's request fully before acting by analysing it step-by-step.
+2. Use tools in **parallel** when tasks are independent.
+3. Use **sequential** calls only when one result depends on another.
+4. Avoid unnecessary steps — combine or batch operations when possible.
+5. Think before executing. Finish the task **accurately** and **within the limit**.
+
+Bad examples:
+- Breaking simple tasks into too many steps
+- Using 3 turns for 1 + 2 + 3
+- Good: 1 + 2 → + 3 → Final answer (2 turns)
+- Best: If supported, do all at once (1 turn)
+
+Always minimize turns. Finish the task correctly.
+"""
 
 class MCPClient:
-    def __init__(self):
-        self.client = genai.Client(api_key=gemini_api_key)
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = config or {}
+        self.client = wrap_client(lambda: genai.Client(api_key=gemini_api_key)) # GEMINI_REPLAY_MODE=record/replay
         
         self.sessions: Dict[str, ClientSession] = {}
-        self.streams_contexts: Dict[str, any] = {}
-        self.session_contexts: Dict[str, any] = {}
+        self.session_stops: Dict[str, asyncio.Event] = {}
+        self.session_tasks: Dict[str, asyncio.Task] = {}
         
         self.tools_list = []
         self.tool_to_server_mapping = {}
+        self.tool_declarations: Dict[str, Tool] = {}
+        self.tool_index = ToolIndex()
+        self.server_configs: Dict[str, Dict] = {}
+        self.server_tools: Dict[str, List] = {}
+        self.server_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.connect_tasks: Dict[str, asyncio.Task] = {}
+        self.background_tasks = set()
+        self.connect_timeout = self.config.get("connect_timeout", 60)
+        tracing_config = self.config.get("tracing", {})
+        self.tracer = Tracer(tracing_config.get("path", ".cache/traces.jsonl") if tracing_config.get("enabled") else None)
+        supervisor_config = self.config.get("supervisor", {})
+        self.supervisor = ConnectionSupervisor(self, supervisor_config) if supervisor_config.get("enabled") else None
+        manifest_config = self.config.get("manifest_cache", {})
+        self.manifest_cache = ManifestCache(manifest_config.get("path", ".cache/manifests")) if manifest_config.get("enabled") else None
+        self.tool_cache = ToolResultCache(self.config.get("tool_cache"))
+        rate_limit_config = self.config.get("rate_limit", {})
+        self.limiter = RateLimiter(rate_limit_config) if rate_limit_config.get("enabled") else None
         self.max_turns = 5
 
 
@@ -33,24 +84,8 @@ class MCPClient:
         print(f"Connecting to SSE server [{server_id}]: {server_url}")
         try:
             streams_context = sse_client(url=server_url)
-            streams = await streams_context.__aenter__()
-            session_context = ClientSession(*streams)
-            session = await session_context.__aenter__()
-            await session.initialize()
-
-            self.streams_contexts[server_id] = streams_context
-            self.session_contexts[server_id] = session_context
-            self.sessions[server_id] = session
-
-            response = await session.list_tools()
-            tools = response.tools
-            print(f"SSE Server [{server_id}] connected with tools: {[tool.name for tool in tools]}")
-
-            server_tools = convert_mcp_tools_to_gemini(tools)
-            self.tools_list.extend(server_tools)
-            for tool in tools:
-                self.tool_to_server_mapping[tool.name] = server_id
-                
+            await self.start_session(streams_context, server_id)
+            print(f"SSE Server [{server_id}] connected")
             return True
             
         except Exception as e:
@@ -58,6 +93,19 @@ class MCPClient:
             return False
 
 
+    async def connect_to_streamable_http_server(self, server_url: str, server_id: str):
+        print(f"Connecting to streamable HTTP server [{server_id}]: {server_url}")
+        try:
+            streams_context = streamablehttp_client(url=server_url)
+            await self.start_session(streams_context, server_id)
+            print(f"Streamable HTTP Server [{server_id}] connected")
+            return True
+
+        except Exception as e:
+            print(f"Error connecting to streamable HTTP server [{server_id}]: {e}")
+            return False
+
+
     async def connect_to_subprocess_server(self, command: str, args: List[str], env: Dict[str, str], server_id: str):
         print(f"Starting subprocess server [{server_id}]: {command} {' '.join(args)}")
         try:
@@ -71,24 +119,8 @@ class MCPClient:
             )
             
             streams_context = stdio_client(server_params)
-            streams = await streams_context.__aenter__()
-            session_context = ClientSession(*streams)
-            session = await session_context.__aenter__()
-            await session.initialize()
-
-            self.streams_contexts[server_id] = streams_context
-            self.session_contexts[server_id] = session_context
-            self.sessions[server_id] = session
-
-            response = await session.list_tools()
-            tools = response.tools
-            print(f"Subprocess server [{server_id}] connected with tools: {[tool.name for tool in tools]}")
-
-            server_tools = convert_mcp_tools_to_gemini(tools)
-            self.tools_list.extend(server_tools)
-            for tool in tools:
-                self.tool_to_server_mapping[tool.name] = server_id
-                
+            await self.start_session(streams_context, server_id)
+            print(f"Subprocess server [{server_id}] connected")
             return True
             
         except Exception as e:
@@ -96,8 +128,131 @@ class MCPClient:
             return False
 
 
+    async def start_session(self, streams_context, server_id: str):
+        ready = asyncio.get_running_loop().create_future()
+        stop = asyncio.Event()
+        task = self.run_in_background(self.hold_session(streams_context, server_id, ready, stop))
+        try:
+            session = await asyncio.wait_for(asyncio.shield(ready), timeout=self.connect_timeout)
+        except BaseException:
+            task.cancel()
+            raise
+
+        self.sessions[server_id] = session
+        self.session_stops[server_id] = stop
+        self.session_tasks[server_id] = task
+        if self.supervisor:
+            self.supervisor.connected(server_id)
+
+        if server_id in self.server_tools: # started from the manifest cache, revalidate without blocking callers
+            self.run_in_background(self.refresh_tools(server_id))
+        else:
+            await self.refresh_tools(server_id)
+
+
+    async def hold_session(self, streams_context, server_id: str, ready: asyncio.Future, stop: asyncio.Event):
+        # enter and exit the transport in one task, anyio cancel scopes require it
+        session = None
+        reason = "connection closed"
+        try:
+            async with streams_context as streams:
+                async with ClientSession(*streams[:2]) as session: # streamable HTTP also yields a session id getter
+                    await session.initialize()
+                    ready.set_result(session)
+                    await stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            reason = repr(e)
+        finally:
+            if not ready.done():
+                ready.cancel()
+            if session is not None and self.sessions.get(server_id) is session:
+                self.sessions.pop(server_id, None)
+                self.session_stops.pop(server_id, None)
+                self.session_tasks.pop(server_id, None)
+                if not stop.is_set() and self.supervisor: # the server went away on its own
+                    self.supervisor.mark_down(server_id, reason)
+
+
+    async def disconnect(self, server_id: str):
+        stop = self.session_stops.pop(server_id, None)
+        task = self.session_tasks.pop(server_id, None)
+        self.sessions.pop(server_id, None)
+        connect_task = self.connect_tasks.get(server_id)
+        if connect_task is not None and connect_task.done(): # an in-flight connect is left to finish
+            self.connect_tasks.pop(server_id, None)
+        if stop:
+            stop.set()
+        if task:
+            try:
+                await asyncio.wait_for(task, timeout=5)
+            except Exception as e:
+                print(f"Error cleanup server {server_id}: {e!r}")
+
+
+    async def refresh_tools(self, server_id: str):
+        try:
+            response = await self.sessions[server_id].list_tools()
+        except Exception as e:
+            print(f"Error listing tools of [{server_id}]: {e}")
+            return
+        tools = response.tools
+        cached_tools = self.server_tools.get(server_id)
+        if cached_tools is not None and ManifestCache.same_tools(cached_tools, tools):
+            return
+
+        print(f"Server [{server_id}] tools: {[tool.name for tool in tools]}")
+        declarations = convert_mcp_tools_to_gemini(tools)
+        self.register_tools(tools, server_id, declarations)
+        if self.manifest_cache:
+            self.manifest_cache.save(server_id, self.server_configs[server_id], tools, declarations)
+
+
+    def register_tools(self, tools: List, server_id: str, server_tools: Optional[List[Tool]] = None):
+        for tool in self.server_tools.get(server_id, []): # replace whatever this server exposed before
+            self.tool_to_server_mapping.pop(tool.name, None)
+            self.tool_declarations.pop(tool.name, None)
+            self.tool_index.remove(tool.name)
+
+        server_tools = server_tools or convert_mcp_tools_to_gemini(tools)
+        self.server_tools[server_id] = tools
+        for tool, gemini_tool in zip(tools, server_tools):
+            self.tool_to_server_mapping[tool.name] = server_id
+            self.tool_declarations[tool.name] = gemini_tool
+            self.tool_index.add(tool)
+        self.tools_list = list(self.tool_declarations.values())
+
+
+    def run_in_background(self, coro):
+        task = asyncio.create_task(coro)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_tasks.discard)
+        return task
+
+
+    def select_tools(self, user_prompt: str, conversation_history: ConversationHistory) -> List[Tool]:
+        selection_config = self.config.get("tool_selection", {})
+        if not selection_config.get("enabled", False):
+            return self.tools_list
+
+        used = {part.function_call.name for content in conversation_history for part in content.parts or [] if part.function_call}
+        selected = self.tool_index.select(user_prompt, selection_config.get("top_k", 10), pinned=used) # tools already used stay pinned
+        if selected is None:
+            return self.tools_list
+        print(f"Sending {len(selected)}/{len(self.tool_declarations)} tools: {sorted(selected)}")
+        return [self.tool_declarations[name] for name in self.tool_declarations if name in selected]
+
+
     async def connect_to_server(self, server_config: Dict, server_id: str):
-        if 'url' in server_config: # Local SSE server
+        self.server_configs[server_id] = server_config
+        if server_id not in self.server_semaphores:
+            max_concurrency = server_config.get('max_concurrency', DEFAULT_MAX_CONCURRENCY)
+            self.server_semaphores[server_id] = asyncio.Semaphore(max_concurrency)
+
+        if 'url' in server_config and server_config.get('transport') == 'streamable_http':
+            return await self.connect_to_streamable_http_server(server_config['url'], server_id)
+        elif 'url' in server_config: # Local SSE server
             return await self.connect_to_sse_server(server_config['url'], server_id)
         elif 'command' in server_config: # Subprocess server
             command = server_config['command']
@@ -109,104 +264,245 @@ class MCPClient:
             return False
 
 
+    async def ensure_connected(self, server_id: str) -> bool:
+        if server_id in self.sessions:
+            return True
+        task = self.connect_tasks.get(server_id)
+        if task is None or task.done(): # one connect at a time; a finished one is stale, its session is gone
+            task = self.run_in_background(self.connect_to_server(self.server_configs[server_id], server_id))
+            self.connect_tasks[server_id] = task
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled(): # the connect was cancelled, not our caller
+                return False
+            raise
+
+
+    def load_cached_manifest(self, server_config: Dict, server_id: str) -> bool:
+        cached = self.manifest_cache.load(server_id, server_config)
+        if cached is None:
+            return False
+
+        self.server_configs[server_id] = server_config
+        max_concurrency = server_config.get('max_concurrency', DEFAULT_MAX_CONCURRENCY)
+        self.server_semaphores[server_id] = asyncio.Semaphore(max_concurrency)
+        tools, declarations = cached
+        self.register_tools(tools, server_id, declarations)
+        print(f"Server [{server_id}] tools loaded from manifest cache: {[tool.name for tool in tools]}")
+        return True
+
+
     async def connect_to_multiple_servers(self, server_configs: List[Dict]):
         connection_tasks = []
+        cached_servers = []
         for config in server_configs:
-            server_id = config.get('id') or config.get('name', f"server_{len(connection_tasks)}")
+            server_id = config.get('id') or config.get('name', f"server_{len(connection_tasks) + len(cached_servers)}")
+            if self.manifest_cache and self.load_cached_manifest(config, server_id):
+                cached_servers.append(server_id)
+                continue
             task = self.connect_to_server(config, server_id)
             connection_tasks.append(task)
         
         results = await asyncio.gather(*connection_tasks, return_exceptions=True)
         
         successful_connections = sum(1 for result in results if result is True)
-        print(f"\nSuccessfully connected to {successful_connections}/{len(server_configs)} servers")
+        print(f"\nSuccessfully connected to {successful_connections}/{len(connection_tasks)} servers")
+        if self.supervisor:
+            self.supervisor.start()
+        if cached_servers:
+            lazy = self.config.get("manifest_cache", {}).get("lazy_connect", True)
+            print(f"Serving {len(cached_servers)} server(s) from manifest cache, connecting {'on first use' if lazy else 'in background'}")
+            if not lazy:
+                for server_id in cached_servers:
+                    self.connect_tasks[server_id] = self.run_in_background(self.connect_to_server(self.server_configs[server_id], server_id))
         print(f"Total available tools: {len(self.tools_list)}")
 
 
     async def execute_function_calls(self, function_call_parts: List) -> List:
-        function_response_parts = []
-        for function_call_part in function_call_parts:
-            tool_name = function_call_part.function_call.name
-            tool_args = function_call_part.function_call.args
+        # gather keeps response parts in call order, each call handles its own error
+        tasks = [self.execute_function_call(part) for part in function_call_parts]
+        return await asyncio.gather(*tasks)
 
-            server_id = self.tool_to_server_mapping.get(tool_name)
+
+    async def execute_function_call(self, function_call_part) -> types.Part:
+        tool_name = function_call_part.function_call.name
+        tool_args = function_call_part.function_call.args
+
+        server_id = self.tool_to_server_mapping.get(tool_name)
+        with self.tracer.span("tool.call", tool=tool_name, server=server_id,
+                              request_bytes=len(json.dumps(tool_args, default=str))) as span:
             if not server_id:
                 function_response = {"error": f"Tool '{tool_name}' not found in any connected server"}
                 print(f"ERROR: Tool '{tool_name}' not found in any server")
             else:
                 print(f"Calling tool: {tool_name} (from server {server_id}) with args {tool_args}")
-                
-                try:
-                    session = self.sessions[server_id]
-                    result = await session.call_tool(tool_name, tool_args)
-                    function_response = {"result": result.content}
-                    print(f"Tool {tool_name} completed successfully")
-                except Exception as e:
-                    function_response = {"Error": str(e)}
+
+                cacheable = self.tool_cache.cacheable(tool_name)
+                cache_key = self.tool_cache.make_key(server_id, tool_name, tool_args) if cacheable else None
+                hit, cached_content = self.tool_cache.get(cache_key) if cacheable else (False, None)
+                span.set(cache_hit=hit)
+
+                if hit:
+                    function_response = {"result": cached_content}
+                    print(f"Tool {tool_name} served from cache")
+                else:
+                    try:
+                        if self.supervisor and not await self.supervisor.wait_available(server_id):
+                            raise ConnectionError(f"Server '{server_id}' is reconnecting, try again later")
+                        if not await self.ensure_connected(server_id): # servers started from the manifest cache connect here
+                            raise ConnectionError(f"Server '{server_id}' is not connected")
+                        session = self.sessions[server_id]
+                        async with self.server_semaphores[server_id]: # per-server in-flight cap
+                            call_start = time.perf_counter()
+                            result = await session.call_tool(tool_name, tool_args)
+                            span.set(call_ms=(time.perf_counter() - call_start) * 1000)
+                        function_response = {"result": result.content}
+                        if cacheable and not result.isError:
+                            self.tool_cache.put(cache_key, result.content)
+                        if result.isError:
+                            span.set(error="tool returned isError")
+                        print(f"Tool {tool_name} completed successfully")
+                    except Exception as e:
+                        function_response = {"Error": str(e)}
+                        span.set(error=str(e))
+                        if self.supervisor: # check the session now instead of at the next scheduled ping
+                            self.run_in_background(self.supervisor.check(server_id))
 
             function_response_part = types.Part.from_function_response(
                 name=tool_name,
                 response=function_response
             )
-            function_response_parts.append(function_response_part)
-        
-        return function_response_parts
-
-    async def process(self, user_prompt: str) -> str:
-        system_prompt = """
-        You are a smart assistant with access to tools on multiple servers.
+            span.set(response_bytes=len(function_response_part.function_response.model_dump_json(exclude_none=True)))
+        return function_response_part
+
+    async def generate(self, contents: List[types.Content], tools: List[Tool],
+                       stream: bool = True) -> AsyncIterator[types.GenerateContentResponse]:
+        config = types.GenerateContentConfig(
+            system_instruction=SYSTEM_PROMPT,
+            tools=tools
+        )
+        with self.tracer.span("llm.generate", model=MODEL, stream=stream, tools=len(tools), contents=len(contents)) as span:
+            usage = None
+            estimated = sum(estimate_tokens(content) for content in contents)
+
+            async def open_stream():
+                # errors usually surface on the first chunk, so it is part of the retried call
+                chunks = await self.client.aio.models.generate_content_stream(model=MODEL, contents=contents, config=config)
+                async for first in chunks:
+                    return chunks, first
+                return chunks, None
+
+            async def unlimited_stream():
+                chunks, first = await open_stream()
+                if first is not None:
+                    yield first
+                    async for chunk in chunks:
+                        yield chunk
+
+            def on_wait(waited: float):
+                span.set(queue_wait_ms=round(waited * 1000, 3))
+
+            async def limited(call):
+                if self.limiter is None:
+                    return await call()
+                return await self.limiter.run(call, tokens=estimated, on_wait=on_wait)
+
+            if stream:
+                # the limiter keeps its slot until the last chunk, retrying only up to the first one
+                chunks = self.limiter.stream(open_stream, tokens=estimated, on_wait=on_wait) if self.limiter else unlimited_stream()
+                async with aclosing(chunks):
+                    async for chunk in chunks:
+                        usage = chunk.usage_metadata or usage
+                        yield chunk
+            else:
+                response = await limited(lambda: self.client.aio.models.generate_content(model=MODEL, contents=contents, config=config))
+                usage = response.usage_metadata
+                yield response
+            if self.limiter and usage:
+                self.limiter.settle(estimated, usage.total_token_count)
+            if usage:
+                span.set(prompt_token_count=usage.prompt_token_count,
+                         candidates_token_count=usage.candidates_token_count,
+                         total_token_count=usage.total_token_count)
 
-        You have a limit of **Turn**(either text, function call or both) per task. Plan carefully.
 
-        Your job:
-        1. Understand the user's request fully before acting by analysing it step-by-step.
-        2. Use tools in **parallel** when tasks are independent.
-        3. Use **sequential** calls only when one result depends on another.
-        4. Avoid unnecessary steps — combine or batch operations when possible.
-        5. Think before executing. Finish the task **accurately** and **within the limit**.
+    def new_history(self) -> ConversationHistory:
+        return ConversationHistory(self.config.get("history"))
 
-        Bad examples:
-        - Breaking simple tasks into too many steps
-        - Using 3 turns for 1 + 2 + 3
-        - Good: 1 + 2 → + 3 → Final answer (2 turns)
-        - Best: If supported, do all at once (1 turn)
 
-        Always minimize turns. Finish the task correctly.
+    async def process_stream(self, user_prompt: str, conversation_history: Optional[ConversationHistory] = None,
+                             stream: bool = True) -> AsyncIterator[Dict]:
+        """
+        Run the agent loop, yielding events as they happen:
+        text (delta), tool_call, tool_result, turn (with time-to-first-token) and done (final text).
         """
+        if conversation_history is None: # callers pass their own history to keep a multi-prompt conversation
+            conversation_history = self.new_history()
         user_prompt_content = add_json_role('user', user_prompt)
-        conversation_history = [user_prompt_content]
-
-        turn_count = 0
-        while turn_count < self.max_turns:
-            turn_count += 1
-            print(f"\n=== Turn {turn_count} ===")
-
-            response = self.client.models.generate_content(
-                model="gemini-2.0-flash-001",
-                contents=conversation_history,
-                config=types.GenerateContentConfig(
-                    system_instruction=system_prompt,
-                    tools=self.tools_list
-                )
-            )
-
-            ai_response_parts = response.candidates[0].content.parts
-            ai_response_content = add_json_role('assistant', ai_response_parts)
-            conversation_history.append(ai_response_content)
-            
-            function_call_parts = [part for part in ai_response_parts if hasattr(part, 'function_call') and part.function_call]
-            
-            if function_call_parts:
-                print(f"Agent requested {len(function_call_parts)} tool call(s)")
-                function_response_parts = await self.execute_function_calls(function_call_parts)
-                function_response_content = add_json_role('tool', function_response_parts)
-                conversation_history.append(function_response_content)
-                continue
-            else:
-                final_text = response.text if response.text else "Task completed."
-                return final_text
-
-        return response.text
+        conversation_history.append(user_prompt_content)
+        tools = self.select_tools(user_prompt, conversation_history)
+
+        with self.tracer.span("prompt", prompt=user_prompt, tools=len(tools)) as span:
+            turn_count = 0
+            final_text = None
+            while turn_count < self.max_turns:
+                turn_count += 1
+                print(f"\n=== Turn {turn_count} ===")
+
+                with self.tracer.span("turn", turn=turn_count) as turn_span:
+                    turn_start = time.perf_counter()
+                    time_to_first_token = None
+                    ai_response_parts = []
+                    if conversation_history.compact():
+                        print(f"History compacted to ~{conversation_history.token_count} tokens")
+                    turn_span.set(history_tokens=conversation_history.token_count)
+                    async for chunk in self.generate(conversation_history.contents, tools, stream):
+                        if time_to_first_token is None:
+                            time_to_first_token = time.perf_counter() - turn_start
+                        if not chunk.candidates or not chunk.candidates[0].content:
+                            continue
+                        for part in chunk.candidates[0].content.parts or []:
+                            ai_response_parts.append(part)
+                            if part.text and not part.thought:
+                                yield {"type": "text", "text": part.text}
+                            if part.function_call:
+                                yield {"type": "tool_call", "name": part.function_call.name, "args": part.function_call.args}
+
+                    ai_response_parts = merge_text_parts(ai_response_parts)
+                    turn_span.set(time_to_first_token_ms=time_to_first_token * 1000 if time_to_first_token is not None else None)
+                    yield {"type": "turn", "turn": turn_count, "time_to_first_token": time_to_first_token,
+                           "elapsed": time.perf_counter() - turn_start}
+
+                    ai_response_content = add_json_role('assistant', ai_response_parts)
+                    conversation_history.append(ai_response_content)
+                    final_text = "".join(part.text for part in ai_response_parts if part.text and not part.thought) or None
+
+                    function_call_parts = [part for part in ai_response_parts if hasattr(part, 'function_call') and part.function_call]
+                    turn_span.set(tool_calls=len(function_call_parts))
+
+                    if function_call_parts:
+                        print(f"Agent requested {len(function_call_parts)} tool call(s)")
+                        function_response_parts = await self.execute_function_calls(function_call_parts)
+                        for part in function_response_parts:
+                            yield {"type": "tool_result", "name": part.function_response.name, "response": part.function_response.response}
+                        function_response_content = add_json_role('tool', function_response_parts)
+                        conversation_history.append(function_response_content)
+                        continue
+                    else:
+                        final_text = final_text or "Task completed."
+                        break
+            span.set(turns=turn_count)
+
+        yield {"type": "done", "text": final_text, "turns": turn_count}
+
+
+    async def process(self, user_prompt: str, conversation_history: Optional[ConversationHistory] = None) -> str:
+        final_text = None
+        async for event in self.process_stream(user_prompt, conversation_history, stream=False): # drain so spans close here
+            if event["type"] == "done":
+                final_text = event["text"]
+        return final_text
 
 
     async def chat_loop(self):
@@ -216,23 +512,24 @@ class MCPClient:
   
         while True:
             print("="*50)
-            user_prompt = input("User: ").strip()
+            user_prompt = (await asyncio.to_thread(input, "User: ")).strip() # keep the loop free while waiting
             if user_prompt.lower() in ['exit', 'quit']:
                 break
 
-            response = await self.process(user_prompt)
-            print("\nAgent: " + response)
+            print("\nAgent: ", end="", flush=True)
+            async for event in self.process_stream(user_prompt):
+                if event["type"] == "text":
+                    print(event["text"], end="", flush=True)
+                elif event["type"] == "turn" and event["time_to_first_token"] is not None:
+                    print(f"\n[turn {event['turn']}: first token after {event['time_to_first_token']:.2f}s]", flush=True)
+            print()
 
 
     async def cleanup(self):
-        for server_id in list(self.session_contexts.keys()):
-            try:
-                if self.session_contexts[server_id]:
-                    await self.session_contexts[server_id].__aexit__(None, None, None)
-                if self.streams_contexts[server_id]:
-                    await self.streams_contexts[server_id].__aexit__(None, None, None)
-            except Exception as e:
-                print(f"Error cleanup server {server_id}: {e}")
+        if self.supervisor:
+            await self.supervisor.stop()
+        await asyncio.gather(*(self.disconnect(server_id) for server_id in list(self.sessions.keys())))
+        self.tracer.close()
 
 
 def add_json_role(role: str, parts) -> types.Content:
@@ -241,6 +538,18 @@ def add_json_role(role: str, parts) -> types.Content:
     return types.Content(role=role, parts=parts)
 
 
+def merge_text_parts(parts: List[types.Part]) -> List[types.Part]:
+    # streamed replies arrive as many small text parts, keep one per run of text
+    merged = []
+    for part in parts:
+        is_plain_text = part.text is not None and not part.thought and not part.function_call
+        if is_plain_text and merged and merged[-1].text is not None and not merged[-1].thought and not merged[-1].function_call:
+            merged[-1] = types.Part.from_text(text=merged[-1].text + part.text)
+        else:
+            merged.append(part)
+    return merged
+
+
 def convert_mcp_tools_to_gemini(mcp_tools):
     gemini_tools = []
 
@@ -283,16 +592,21 @@ def convert_mcp_tools_to_gemini(mcp_tools):
     return gemini_tools
 
 
-async def main():
-    client = MCPClient()
-
+def load_config(path: str = "config.json") -> Dict:
     try:
-        with open("config.json", "r") as f:
+        with open(path, "r") as f:
             config_data = json.load(f)
-            server_configs = config_data.get("servers", [])
-            print(f"Loaded {len(server_configs)} server configurations\n")
+            print(f"Loaded {len(config_data.get('servers', []))} server configurations\n")
+            return config_data
     except (FileNotFoundError, json.JSONDecodeError) as e:
         print(f"Error JSON: {e}")
+        return {}
+
+
+async def main():
+    config_data = load_config()
+    client = MCPClient(config_data)
+    server_configs = config_data.get("servers", [])
 
     try:
         await client.connect_to_multiple_servers(server_configs)
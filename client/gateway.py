@@ -0,0 +1,221 @@
+import asyncio
+import json
+import time
+import uuid
+import argparse
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from starlette.applications import Starlette
+from starlette.routing import Route
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+import uvicorn
+from client import MCPClient, load_config
+from history import ConversationHistory
+
+
+class Overloaded(Exception):
+    pass
+
+
+class AdmissionController:
+    """Caps prompts running at once and how many may wait; anything beyond is rejected."""
+    def __init__(self, max_active: int, max_queued: int):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.semaphore = asyncio.Semaphore(max_active)
+        self.active = 0
+        self.queued = 0
+        self.rejected = 0
+
+    @property
+    def full(self) -> bool:
+        return self.semaphore.locked() and self.queued >= self.max_queued
+
+    @asynccontextmanager
+    async def admit(self):
+        if self.full:
+            self.rejected += 1
+            raise Overloaded()
+
+        self.queued += 1
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.queued -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.semaphore.release()
+
+
+class Conversation:
+    def __init__(self, history: ConversationHistory):
+        self.history = history
+        self.lock = asyncio.Lock() # one prompt at a time per conversation
+        self.last_used = time.monotonic()
+
+
+class ConversationStore:
+    """Per-conversation history, evicting the least recently used conversation when full."""
+    def __init__(self, client: MCPClient, max_conversations: int):
+        self.client = client
+        self.max_conversations = max_conversations
+        self.conversations: OrderedDict[str, Conversation] = OrderedDict()
+
+    def create(self, conversation_id: str) -> Conversation:
+        conversation = Conversation(self.client.new_history())
+        self.conversations[conversation_id] = conversation
+        while len(self.conversations) > self.max_conversations:
+            self.conversations.popitem(last=False)
+        return conversation
+
+    def get(self, conversation_id: str) -> Optional[Conversation]:
+        conversation = self.conversations.get(conversation_id)
+        if conversation is None:
+            return None
+        self.conversations.move_to_end(conversation_id)
+        conversation.last_used = time.monotonic()
+        return conversation
+
+    def delete(self, conversation_id: str) -> bool:
+        return self.conversations.pop(conversation_id, None) is not None
+
+
+def to_jsonable(obj):
+    # tool results carry MCP content models
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json", exclude_none=True)
+    return str(obj)
+
+
+def create_gateway_app(config_data: Dict, *, debug: bool = False) -> Starlette:
+    gateway_config = config_data.get("gateway", {})
+    client = MCPClient(config_data)
+    admission = AdmissionController(
+        max_active=gateway_config.get("max_active", 64),
+        max_queued=gateway_config.get("max_queued", 256)
+    )
+    store = ConversationStore(client, gateway_config.get("max_conversations", 10000))
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette):
+        await client.connect_to_multiple_servers(config_data.get("servers", [])) # one pool shared by every conversation
+        try:
+            yield
+        finally:
+            await client.cleanup()
+
+    async def create_conversation(request: Request) -> JSONResponse:
+        conversation_id = uuid.uuid4().hex
+        store.create(conversation_id)
+        return JSONResponse({"conversation_id": conversation_id}, status_code=201)
+
+    async def delete_conversation(request: Request) -> JSONResponse:
+        if not store.delete(request.path_params["conversation_id"]):
+            return JSONResponse({"error": "Conversation not found"}, status_code=404)
+        return JSONResponse({"deleted": True})
+
+    async def post_message(request: Request) -> JSONResponse:
+        try:
+            body = await request.json()
+            prompt = body["prompt"]
+        except Exception:
+            return JSONResponse({"error": "Body must be JSON with a 'prompt' field"}, status_code=400)
+
+        conversation = store.get(request.path_params["conversation_id"])
+        if conversation is None:
+            return JSONResponse({"error": "Conversation not found"}, status_code=404)
+        start = time.perf_counter()
+        try:
+            async with conversation.lock: # prompts queued behind a busy conversation don't use up admission
+                async with admission.admit():
+                    checkpoint = conversation.history.checkpoint()
+                    try:
+                        response = await client.process(prompt, conversation.history)
+                    except BaseException:
+                        conversation.history.restore(checkpoint) # no user turn left without its answer
+                        raise
+        except Overloaded:
+            return JSONResponse({"error": "Too many requests in flight"}, status_code=503, headers={"Retry-After": "1"})
+        except Exception as e:
+            return JSONResponse({"error": str(e)}, status_code=500)
+
+        return JSONResponse({"response": response, "elapsed": time.perf_counter() - start})
+
+    async def stream_message(request: Request) -> Response:
+        try:
+            body = await request.json()
+            prompt = body["prompt"]
+        except Exception:
+            return JSONResponse({"error": "Body must be JSON with a 'prompt' field"}, status_code=400)
+
+        conversation = store.get(request.path_params["conversation_id"])
+        if conversation is None:
+            return JSONResponse({"error": "Conversation not found"}, status_code=404)
+        if admission.full:
+            return JSONResponse({"error": "Too many requests in flight"}, status_code=503, headers={"Retry-After": "1"})
+
+        async def events():
+            # the slot is taken and released here, so a stream that never starts holds nothing
+            try:
+                async with conversation.lock: # as in post_message, only the prompt being run counts
+                    async with admission.admit():
+                        checkpoint = conversation.history.checkpoint()
+                        try:
+                            async for event in client.process_stream(prompt, conversation.history):
+                                yield json.dumps(event, default=to_jsonable) + "\n"
+                        except Exception as e:
+                            conversation.history.restore(checkpoint)
+                            yield json.dumps({"type": "error", "error": str(e)}) + "\n"
+                        except BaseException: # the client went away mid-stream
+                            conversation.history.restore(checkpoint)
+                            raise
+            except Overloaded: # filled up between the check and the first read
+                yield json.dumps({"type": "error", "error": "Too many requests in flight"}) + "\n"
+
+        return StreamingResponse(events(), media_type="application/x-ndjson")
+
+    async def health(request: Request) -> JSONResponse:
+        return JSONResponse({
+            "servers": list(client.sessions.keys()),
+            "tools": len(client.tool_to_server_mapping),
+            "conversations": len(store.conversations),
+            "active": admission.active,
+            "queued": admission.queued,
+            "rejected": admission.rejected,
+            "tool_cache": client.tool_cache.stats(),
+            "supervisor": client.supervisor.stats() if client.supervisor else None,
+            "rate_limit": client.limiter.stats() if client.limiter else None
+        })
+
+    app = Starlette(
+        debug=debug,
+        routes=[
+            Route("/health", endpoint=health, methods=["GET"]),
+            Route("/conversations", endpoint=create_conversation, methods=["POST"]),
+            Route("/conversations/{conversation_id}", endpoint=delete_conversation, methods=["DELETE"]),
+            Route("/conversations/{conversation_id}/messages", endpoint=post_message, methods=["POST"]),
+            Route("/conversations/{conversation_id}/stream", endpoint=stream_message, methods=["POST"])
+        ],
+        lifespan=lifespan
+    )
+    app.state.client = client
+    app.state.store = store
+    app.state.admission = admission
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run the agent gateway')
+    parser.add_argument('--host', default='localhost', help='Host to bind to')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on')
+    parser.add_argument('--config', default='config.json', help='Path to config.json')
+    args = parser.parse_args()
+
+    gateway_app = create_gateway_app(load_config(args.config))
+    uvicorn.run(gateway_app, host=args.host, port=args.port)
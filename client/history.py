@@ -0,0 +1,157 @@
+import json
+from typing import Dict, List, Optional, Tuple
+from google.genai import types
+
+CHARS_PER_TOKEN = 4 # rough estimate, good enough to keep prompts under a budget
+SUMMARY_PREFIX = "Summary of earlier conversation:"
+
+
+def part_size(part: types.Part) -> int:
+    if part.text is not None:
+        return len(part.text)
+    if part.function_call:
+        return len(part.function_call.name or "") + len(json.dumps(part.function_call.args, default=str))
+    if part.function_response:
+        return len(part.function_response.name or "") + len(json.dumps(part.function_response.response, default=str))
+    return len(part.model_dump_json(exclude_none=True))
+
+
+def estimate_tokens(content: types.Content) -> int:
+    return sum(part_size(part) for part in content.parts or []) // CHARS_PER_TOKEN + 1
+
+
+def shorten(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+class ConversationHistory:
+    """
+    Conversation contents with a per-content token estimate.
+    compact() keeps the total under max_tokens: old tool outputs are truncated first,
+    then the oldest turns are collapsed into one summary. The latest keep_recent contents,
+    any function call/response pair they touch, and the prompt being answered are never changed.
+    """
+    def __init__(self, history_config: Optional[Dict] = None):
+        history_config = history_config or {}
+        self.max_tokens = history_config.get("max_tokens", 32000)
+        self.max_tool_output_chars = history_config.get("max_tool_output_chars", 4000)
+        self.keep_recent = history_config.get("keep_recent", 4)
+
+        self.contents: List[types.Content] = []
+        self.token_counts: List[int] = []
+        self.compactions = 0
+
+    def __len__(self) -> int:
+        return len(self.contents)
+
+    def __iter__(self):
+        return iter(self.contents)
+
+    def __getitem__(self, index):
+        return self.contents[index]
+
+    def append(self, content: types.Content):
+        self.contents.append(content)
+        self.token_counts.append(estimate_tokens(content))
+
+    def checkpoint(self) -> Tuple[List[types.Content], List[int]]:
+        return list(self.contents), list(self.token_counts)
+
+    def restore(self, checkpoint: Tuple[List[types.Content], List[int]]):
+        """Go back to a checkpoint, e.g. to drop the turns of a prompt that failed."""
+        self.contents, self.token_counts = list(checkpoint[0]), list(checkpoint[1])
+
+    @property
+    def token_count(self) -> int:
+        return sum(self.token_counts)
+
+    def protected_from(self) -> int:
+        start = max(len(self.contents) - self.keep_recent, 0)
+        while start > 0 and self.contents[start].role == 'tool': # keep the call that produced this response
+            start -= 1
+        return start
+
+    def compact(self) -> bool:
+        if self.token_count <= self.max_tokens:
+            return False
+
+        self.compactions += 1
+        protected = self.protected_from()
+
+        for index in range(protected):
+            if self.token_count <= self.max_tokens:
+                return True
+            content = self.contents[index]
+            if any(part.function_response for part in content.parts or []):
+                self.replace(index, self.truncate_tool_output(content))
+
+        prompt = self.prompt_index()
+        if prompt is None or prompt >= protected:
+            self.collapse(0, protected)
+        else: # a long tool loop left the prompt being answered among the old turns, it stays whole
+            removed = self.collapse(0, prompt)
+            self.collapse(prompt - removed + 1, protected - removed)
+        return True
+
+    def prompt_index(self) -> Optional[int]:
+        # the latest user text, i.e. the prompt the current turns are answering
+        for index in range(len(self.contents) - 1, -1, -1):
+            content = self.contents[index]
+            if content.role == 'user' and any(part.text and not part.text.startswith(SUMMARY_PREFIX) for part in content.parts or []):
+                return index
+        return None
+
+    def collapse(self, start: int, end: int) -> int:
+        """Fold the oldest contents in [start, end) into one summary until under budget; returns how many were removed."""
+        until = start
+        while self.token_count - sum(self.token_counts[start:until]) > self.max_tokens and until < end:
+            until += 1
+        while start < until < len(self.contents) and self.contents[until].role == 'tool': # never orphan a response
+            until += 1
+        if until == start:
+            return 0
+        summary = self.summarize(self.contents[start:until])
+        self.contents[start:until] = [summary]
+        self.token_counts[start:until] = [estimate_tokens(summary)]
+        return until - start - 1
+
+    def replace(self, index: int, content: types.Content):
+        self.contents[index] = content
+        self.token_counts[index] = estimate_tokens(content)
+
+    def truncate_tool_output(self, content: types.Content) -> types.Content:
+        parts = []
+        for part in content.parts or []:
+            if part.function_response:
+                output = json.dumps(part.function_response.response, default=str)
+                if len(output) > self.max_tool_output_chars:
+                    kept = output[:self.max_tool_output_chars]
+                    part = types.Part.from_function_response(
+                        name=part.function_response.name,
+                        response={"result": f"{kept}... [{len(output) - len(kept)} chars elided]"}
+                    )
+            parts.append(part)
+        return types.Content(role=content.role, parts=parts)
+
+    def summarize(self, contents: List[types.Content]) -> types.Content:
+        lines = [SUMMARY_PREFIX]
+        for content in contents:
+            for part in content.parts or []:
+                if part.text and part.text.startswith(SUMMARY_PREFIX):
+                    lines.extend(part.text.splitlines()[1:]) # fold in the previous summary
+                elif part.text and not part.thought:
+                    lines.append(f"- {content.role}: {shorten(part.text, 200)}")
+                elif part.function_call:
+                    lines.append(f"- called {part.function_call.name}({shorten(json.dumps(part.function_call.args, default=str), 120)})")
+                elif part.function_response:
+                    lines.append(f"- {part.function_response.name} returned: {shorten(json.dumps(part.function_response.response, default=str), 120)}")
+        budget = self.max_tokens * CHARS_PER_TOKEN // 8 # the summary itself stays bounded, newest lines win
+        kept = []
+        for line in reversed(lines[1:]):
+            budget -= len(line) + 1
+            if budget < 0:
+                break
+            kept.append(line)
+        lines = lines[:1] + kept[::-1]
+        return types.Content(role='user', parts=[types.Part.from_text(text="\n".join(lines))])
@@ -0,0 +1,57 @@
+import hashlib
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+from mcp.types import Tool as MCPTool
+from google.genai.types import Tool
+
+MANIFEST_VERSION = 1 # bump when the stored format or convert_mcp_tools_to_gemini changes
+IGNORED_KEYS = {"description", "max_concurrency"} # settings that do not change what a server exposes
+
+
+class ManifestCache:
+    """On-disk copy of each server's tool list and Gemini declarations, keyed by server config and version."""
+    def __init__(self, path: str = ".cache/manifests"):
+        self.path = path
+
+    def key(self, server_config: Dict) -> str:
+        identity = {k: v for k, v in server_config.items() if k not in IGNORED_KEYS}
+        raw = json.dumps([MANIFEST_VERSION, identity], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def file_for(self, server_id: str) -> str:
+        safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in server_id)
+        return os.path.join(self.path, f"{safe_id}.json")
+
+    def load(self, server_id: str, server_config: Dict) -> Optional[Tuple[List[MCPTool], List[Tool]]]:
+        try:
+            with open(self.file_for(server_id), "r") as f:
+                manifest = json.load(f)
+            if manifest.get("key") != self.key(server_config):
+                return None
+            tools = [MCPTool.model_validate(tool) for tool in manifest["tools"]]
+            declarations = [Tool.model_validate(declaration) for declaration in manifest["declarations"]]
+            return tools, declarations
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Ignoring unreadable manifest for [{server_id}]: {e}")
+            return None
+
+    def save(self, server_id: str, server_config: Dict, tools: List[MCPTool], declarations: List[Tool]):
+        manifest = {
+            "key": self.key(server_config),
+            "saved_at": time.time(),
+            "tools": [tool.model_dump(mode="json", by_alias=True, exclude_none=True) for tool in tools],
+            "declarations": [declaration.model_dump(mode="json", exclude_none=True) for declaration in declarations]
+        }
+        os.makedirs(self.path, exist_ok=True)
+        temp_file = self.file_for(server_id) + ".tmp"
+        with open(temp_file, "w") as f:
+            json.dump(manifest, f)
+        os.replace(temp_file, self.file_for(server_id)) # readers never see a half-written manifest
+
+    @staticmethod
+    def same_tools(old: List[MCPTool], new: List[MCPTool]) -> bool:
+        dump = lambda tools: sorted(json.dumps(tool.model_dump(mode="json", exclude_none=True), sort_keys=True) for tool in tools)
+        return dump(old) == dump(new)
@@ -127,7 +127,7 @@ class MCPClient:
             turn_count += 1
             print(f"\n=== Turn {turn_count} ===")
             
-            response = self.client.models.generate_content(
+            response = await self.client.aio.models.generate_content(
                 model="gemini-2.0-flash-001",
                 contents=conversation_history,
                 config=types.GenerateContentConfig(
@@ -162,7 +162,7 @@ class MCPClient:
   
         while True:
             print("="*50)
-            user_prompt = input("User: ").strip()
+            user_prompt = (await asyncio.to_thread(input, "User: ")).strip() # keep the loop free while waiting
             if user_prompt.lower() in ['exit', 'quit']:
                 break
 
@@ -0,0 +1,232 @@
+import asyncio
+import random
+import re
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+THROTTLED_STATUS = {429}
+RETRY_DELAY = re.compile(r"retryDelay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s") # Gemini's RetryInfo detail
+
+
+def status_of(error: BaseException) -> Optional[int]:
+    # google.genai APIError and google.api_core exceptions both carry an int-like .code
+    for attr in ("code", "status_code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return int(value)
+    return getattr(getattr(error, "response", None), "status_code", None)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        if value is not None:
+            return float(value)
+    except (TypeError, ValueError):
+        pass
+    match = RETRY_DELAY.search(str(error))
+    return float(match.group(1)) if match else None
+
+
+def transient(error: BaseException) -> bool:
+    status = status_of(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    return isinstance(error, (ConnectionError, asyncio.TimeoutError)) or type(error).__name__ in ("ConnectError", "ReadError", "RemoteProtocolError")
+
+
+class Bucket:
+    """`per_minute` units, refilled continuously; may go negative when a request used more than estimated."""
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self.refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self.refill()
+        self.level -= amount
+
+
+class RateLimiter:
+    """
+    Client-side limiter for model calls: requests/min and tokens/min budgets, an AIMD concurrency
+    limit that halves on throttling and grows back by one per window of successes, and retries
+    of transient errors with full-jitter backoff or the server's retry-after.
+    """
+    def __init__(self, rate_limit_config: Optional[Dict] = None):
+        rate_limit_config = rate_limit_config or {}
+        rpm = rate_limit_config.get("rpm")
+        tpm = rate_limit_config.get("tpm")
+        self.requests = Bucket(rpm) if rpm else None
+        self.tokens = Bucket(tpm) if tpm else None
+        self.max_concurrency = rate_limit_config.get("max_concurrency", 8)
+        self.min_concurrency = rate_limit_config.get("min_concurrency", 1)
+        self.max_retries = rate_limit_config.get("max_retries", 5)
+        self.backoff_initial = rate_limit_config.get("backoff_initial", 1.0)
+        self.backoff_max = rate_limit_config.get("backoff_max", 60.0)
+
+        self.limit = float(self.max_concurrency)
+        self.active = 0
+        self.waiters = [] # futures of callers waiting for a concurrency slot
+        self.last_decrease = 0.0
+        self.latency = 0.0 # seconds, moving average of successful calls
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        self.queue_waits = deque(maxlen=1000) # seconds, most recent calls
+
+    async def acquire(self, tokens: int) -> float:
+        start = time.monotonic()
+        while self.active >= max(int(self.limit), self.min_concurrency):
+            waiter = asyncio.get_running_loop().create_future()
+            self.waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self.waiters:
+                    self.waiters.remove(waiter)
+        self.active += 1
+        try:
+            while True: # budgets are checked after the slot so the limiter stays fair to early callers
+                delay = max(self.requests.wait_time(1) if self.requests else 0.0,
+                            self.tokens.wait_time(tokens) if self.tokens else 0.0)
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+        except BaseException:
+            self.release()
+            raise
+        if self.requests:
+            self.requests.take(1)
+        if self.tokens:
+            self.tokens.take(tokens)
+        waited = time.monotonic() - start
+        self.queue_waits.append(waited)
+        return waited
+
+    def release(self):
+        self.active -= 1
+        for waiter in self.waiters: # they recheck the limit, which may have shrunk meanwhile
+            if not waiter.done():
+                waiter.set_result(None)
+        self.waiters.clear()
+
+    def on_success(self, elapsed: float):
+        self.latency = 0.8 * self.latency + 0.2 * elapsed if self.latency else elapsed
+        self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    def on_throttled(self):
+        self.throttled += 1
+        now = time.monotonic()
+        if now - self.last_decrease > self.latency: # one cut per round trip, not one per 429 of the same burst
+            self.limit = max(self.min_concurrency, self.limit / 2)
+            self.last_decrease = now
+
+    def backoff(self, error: BaseException, attempt: int) -> float:
+        hinted = retry_after(error)
+        if hinted is not None:
+            return min(hinted, self.backoff_max) + random.uniform(0, self.backoff_initial)
+        return random.uniform(0, min(self.backoff_max, self.backoff_initial * 2 ** attempt))
+
+    def settle(self, estimated: int, actual: Optional[int]):
+        """Charge the difference once the real token count of a call is known."""
+        if self.tokens and actual is not None:
+            self.tokens.take(actual - estimated)
+
+    def finish(self, started: float, error: Optional[BaseException] = None):
+        """Give back the slot of a call that succeeded (error None) or failed for good."""
+        self.release()
+        if error is None:
+            self.on_success(time.monotonic() - started)
+        elif isinstance(error, Exception): # not when the caller was cancelled or stopped reading
+            if status_of(error) in THROTTLED_STATUS:
+                self.on_throttled()
+            self.failures += 1
+
+    async def run(self, call: Callable[[], Awaitable[T]], tokens: int = 0,
+                  on_wait: Optional[Callable[[float], None]] = None, hold: bool = False):
+        """
+        Run call() within the budgets, retrying transient errors; on_wait gets the total seconds spent queued.
+        With hold=True the slot stays taken after call() returns: it returns (result, done), and
+        done(error=None) must be called once the work the call started is over.
+        """
+        attempt = 0
+        waited = 0.0
+        while True:
+            waited += await self.acquire(tokens)
+            if on_wait:
+                on_wait(waited)
+            self.calls += 1
+            started = time.monotonic()
+            try:
+                result = await call()
+            except Exception as e:
+                self.release()
+                if status_of(e) in THROTTLED_STATUS:
+                    self.on_throttled()
+                if not transient(e) or attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+                delay = self.backoff(e, attempt)
+                attempt += 1
+                self.retries += 1
+                print(f"Model call failed ({status_of(e) or type(e).__name__}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+            except BaseException: # cancelled mid-call
+                self.release()
+                raise
+            if hold:
+                return result, lambda error=None: self.finish(started, error)
+            self.finish(started)
+            return result
+
+    async def stream(self, open_stream: Callable[[], Awaitable[Tuple[AsyncIterator[T], Optional[T]]]], tokens: int = 0,
+                     on_wait: Optional[Callable[[float], None]] = None) -> AsyncIterator[T]:
+        """
+        Streamed call: open_stream() returns (chunks, first chunk) and is retried like run(), since past
+        the first chunk a retry would repeat output. The slot is held until the stream ends or fails.
+        """
+        (chunks, first), done = await self.run(open_stream, tokens, on_wait, hold=True)
+        try:
+            if first is not None:
+                yield first
+                async for chunk in chunks:
+                    yield chunk
+        except BaseException as e:
+            done(e)
+            raise
+        done()
+
+    def stats(self) -> Dict:
+        waits = sorted(self.queue_waits)
+        def percentile(fraction: float) -> float:
+            return round(waits[min(len(waits) - 1, int(len(waits) * fraction))] * 1000, 1) if waits else 0.0
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "failures": self.failures,
+            "active": self.active,
+            "concurrency_limit": round(self.limit, 2),
+            "queue_wait_ms_p50": percentile(0.5),
+            "queue_wait_ms_p99": percentile(0.99),
+            "queue_wait_ms_max": round(waits[-1] * 1000, 1) if waits else 0.0
+        }
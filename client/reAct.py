@@ -1,33 +1,68 @@
 # from viewer
 import os
+import re
+import sys
+import time
+import asyncio
+import inspect
+import argparse
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple, Union
 from google import genai
 from google.genai import types
-import re
 from dotenv import load_dotenv
+from replay import wrap_client
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tool"))
+from safe_eval import UnsupportedExpression, evaluate, format_number
 load_dotenv()
 
+MODEL = "gemini-2.0-flash"
+DEFAULT_MAX_STEPS = 8 # model turns before giving up
+
+ToolFunction = Callable[[str], Union[str, Awaitable[str]]]
+
+
+class ToolRegistry:
+    """Tools the model can call as <name>input</name>; functions may be sync or async."""
+    def __init__(self):
+        self.tools: Dict[str, ToolFunction] = {}
+        self.descriptions: Dict[str, str] = {}
+
+    def register(self, name: str, function: ToolFunction, description: str = ""):
+        self.tools[name] = function
+        self.descriptions[name] = description
+
+    def pattern(self) -> re.Pattern:
+        names = "|".join(re.escape(name) for name in self.tools)
+        return re.compile(rf"<({names})>(.*?)</\1>", re.DOTALL)
+
+    async def run(self, name: str, tool_input: str) -> str:
+        try:
+            result = self.tools[name](tool_input)
+            if inspect.isawaitable(result):
+                result = await result
+            return str(result)
+        except Exception as e:
+            return f"Error: {str(e)}"
 
-def extract_action(text):
-    match = re.search(r"<calculator>(.*?)</calculator>", text, re.DOTALL)
-    if match:
-        return match.group(1).strip()
-    return None
 
 def run_calculator(expression: str) -> str:
+    print('[LOG] LLM sử dụng tool để tính toán', expression)
     try:
-        print('[LOG] LLM sử dụng tool để tính toán', expression)
-        result = eval(expression, {"__builtins__": {}})
-        return str(result)
-    except Exception as e:
-        return f"Error: {str(e)}"
-
-def generate():
-    client = genai.Client(
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
-    model = "gemini-2.0-flash"
+        return format_number(evaluate(expression)) # AST only, memoized; no eval
+    except UnsupportedExpression as e:
+        return f"Error: không hỗ trợ biểu thức này ({e})"
+
 
-    system_instruction = types.Part.from_text(text="""Bạn là một AI có thể gọi công cụ \"Calculator\" để thực hiện các phép tính.
+def default_registry() -> ToolRegistry:
+    registry = ToolRegistry()
+    registry.register("calculator", run_calculator, "biểu thức số học, hỗ trợ sqrt, pow, log, sin, cos, tan, pi, e")
+    return registry
+
+
+SYSTEM_PROMPT = """Bạn là một AI có thể gọi các công cụ để thực hiện các phép tính.
+Các công cụ:
+{tools}
 Khi người dùng yêu cầu tính toán hoặc đưa ra biểu thức toán học, hãy lần lượt thực hiện theo chu trình ReAct:
 
 1. Thought: Suy nghĩ xem cần tính gì
@@ -35,65 +70,119 @@ Khi người dùng yêu cầu tính toán hoặc đưa ra biểu thức toán h
 3. Observation: Kết quả từ công cụ
 4. Lặp lại nếu cần đến khi đưa ra Answer cuối cùng.
 Hành động theo lượt như sau
-- Model sẽ trả về Thought, Action
-- User sẽ đưa ra Observation
+- Model sẽ trả về Thought và một hoặc nhiều Action
+- Nếu các phép tính không phụ thuộc vào nhau, hãy đưa ra tất cả Action trong cùng một lượt
+- User sẽ đưa ra Observation cho từng Action theo đúng thứ tự
 - Model tiếp tục hành động cho đến khi đưa ra kết quả
 # Ví dụ
 <example>
 <user_query>
-Tính tổng 100 và 200
+Tính tổng của căn bậc hai của 16 và 10 chia 2
 </user_query>
 <assistant_response>
-Thought: Sử dụng tool caculator để tính 100 và 200
-Action: <calculator>100 + 200</calculator>
+Thought: Hai phép tính độc lập, tính cả hai cùng lúc
+Action: <calculator>sqrt(16)</calculator>
+Action: <calculator>10 / 2</calculator>
 </assistant_response>
 <user_query>
-Observation: 300
+Observation 1: 4
+Observation 2: 5
 </user_query>
 <assistant_response>
-Thought: Tổng 100 và 200 là 300
-Answer: 300
+Thought: Cộng hai kết quả
+Action: <calculator>4 + 5</calculator>
+</assistant_response>
+<user_query>
+Observation 1: 9
+</user_query>
+<assistant_response>
+Thought: Kết quả là 9
+Answer: 9
 </assistant_response>
 </example>
-Luôn dùng Calculator để tính, không tự tính thủ công.""")
-
-    user_query = "Tính căn bậc hai của 16 cộng với 4 chia 2"
-
-    contents = [
-        types.Content(role="user", parts=[types.Part.from_text(text=user_query)])
-    ]
-
-    while True:
-        response = client.models.generate_content(
-            model=model,
+Luôn dùng công cụ để tính, không tự tính thủ công."""
+
+
+class ReActEngine:
+    """
+    Async ReAct loop: every action in a model reply is parsed and the actions of one turn run concurrently,
+    their observations going back in a single message.
+    """
+    def __init__(self, client, registry: Optional[ToolRegistry] = None, model: str = MODEL,
+                 max_steps: int = DEFAULT_MAX_STEPS, verbose: bool = True):
+        self.client = client
+        self.registry = registry or default_registry()
+        self.model = model
+        self.max_steps = max_steps
+        self.verbose = verbose
+        self.llm_calls = 0
+        tools = "\n".join(f"- <{name}>...</{name}>: {description}" for name, description in self.registry.descriptions.items())
+        self.system_instruction = types.Part.from_text(text=SYSTEM_PROMPT.format(tools=tools))
+
+    def log(self, *args):
+        if self.verbose:
+            print(*args)
+
+    def extract_actions(self, text: str) -> List[Tuple[str, str]]:
+        return [(name, tool_input.strip()) for name, tool_input in self.registry.pattern().findall(text)]
+
+    async def step(self, contents: List[types.Content]) -> str:
+        self.llm_calls += 1
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
             contents=contents,
             config=types.GenerateContentConfig(
-                system_instruction=[system_instruction],
+                system_instruction=[self.system_instruction],
             ),
         )
+        return response.text or ""
 
-        model_reply = response.text
-        print("Model:", model_reply)
+    async def run(self, user_query: str) -> str:
+        contents = [
+            types.Content(role="user", parts=[types.Part.from_text(text=user_query)])
+        ]
 
-        contents.append(
-            types.Content(role="model", parts=[types.Part.from_text(text=model_reply)])
-        )
+        for _ in range(self.max_steps):
+            model_reply = await self.step(contents)
+            self.log("Model:", model_reply)
+            contents.append(
+                types.Content(role="model", parts=[types.Part.from_text(text=model_reply)])
+            )
 
-        if "Answer:" in model_reply:
-            break
+            if "Answer:" in model_reply:
+                return model_reply.split("Answer:", 1)[1].strip()
 
-        expr = extract_action(model_reply)
-        if expr is None:
-            print("Không tìm thấy hành động calculator.")
-            break
+            actions = self.extract_actions(model_reply)
+            if not actions:
+                self.log("Không tìm thấy hành động nào.")
+                return model_reply
 
-        observation = run_calculator(expr)
-        print("Observation:", observation)
+            observations = await asyncio.gather(*(self.registry.run(name, tool_input) for name, tool_input in actions))
+            observation = "\n".join(f"Observation {i + 1}: {result}" for i, result in enumerate(observations))
+            self.log(observation)
+            contents.append(
+                types.Content(role="user", parts=[types.Part.from_text(text=observation)])
+            )
 
-        contents.append(
-            types.Content(role="user", parts=[types.Part.from_text(text=f"Observation: {observation}")])
-        )
+        self.log(f"Dừng sau {self.max_steps} bước.")
+        return contents[-2].parts[0].text
+
+
+async def generate(user_query: str, max_steps: int = DEFAULT_MAX_STEPS):
+    client = wrap_client(lambda: genai.Client(
+        api_key=os.getenv("GEMINI_API_KEY"),
+    ))
+    engine = ReActEngine(client, max_steps=max_steps)
+
+    start = time.perf_counter()
+    answer = await engine.run(user_query)
+    print(f"Answer: {answer}  ({engine.llm_calls} LLM calls, {time.perf_counter() - start:.2f}s)")
 
 
 if __name__ == "__main__":
-    generate()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='ReAct calculator agent')
+    parser.add_argument('query', nargs='?', default="Tính căn bậc hai của 16 cộng với 4 chia 2", help='Question for the agent')
+    parser.add_argument('--max-steps', type=int, default=DEFAULT_MAX_STEPS, help='Model turns before giving up')
+    args = parser.parse_args()
+
+    asyncio.run(generate(args.query, args.max_steps))
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Optional
+from google.genai import types
+
+# GEMINI_REPLAY_MODE: passthrough (default), record (call the API and store), replay (store only, offline)
+MODES = ("passthrough", "record", "replay")
+DEFAULT_PATH = ".cache/gemini_replay.db"
+
+
+class ReplayMiss(Exception):
+    pass
+
+
+def canonical(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return canonical(value.model_dump(mode="json", exclude_none=True))
+    if isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in value.items() if v is not None}
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def fingerprint(request: Dict) -> str:
+    raw = json.dumps(canonical(request), sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ReplayStore:
+    """Request fingerprint -> zlib-compressed JSON response, in one SQLite file shared by every process."""
+    def __init__(self, path: str = DEFAULT_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS responses (fingerprint TEXT PRIMARY KEY, payload BLOB NOT NULL, created REAL NOT NULL)")
+        self.db.commit()
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self.db.execute("SELECT payload FROM responses WHERE fingerprint = ?", (key,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def put(self, key: str, payload: Any):
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode(), 6)
+        self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, blob, time.time()))
+        self.db.commit()
+
+
+class GeminiReplay:
+    """Record/replay around any model call: the caller says how to encode and decode its response."""
+    def __init__(self, mode: Optional[str] = None, path: Optional[str] = None):
+        self.mode = mode or os.getenv("GEMINI_REPLAY_MODE", "passthrough")
+        if self.mode not in MODES:
+            raise ValueError(f"GEMINI_REPLAY_MODE must be one of {MODES}, got '{self.mode}'")
+        self.store = ReplayStore(path or os.getenv("GEMINI_REPLAY_PATH", DEFAULT_PATH)) if self.mode != "passthrough" else None
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, request: Dict):
+        key = fingerprint(request)
+        payload = self.store.get(key)
+        if payload is not None:
+            self.hits += 1
+            return key, payload
+        self.misses += 1
+        if self.mode == "replay":
+            raise ReplayMiss(f"No recorded response for request {key[:12]} (model {request.get('model')})")
+        return key, None
+
+    async def call(self, request: Dict, call: Callable[[], Awaitable], encode: Callable, decode: Callable):
+        if self.mode == "passthrough":
+            return await call()
+        key, payload = self.lookup(request)
+        if payload is not None:
+            return decode(payload)
+        response = await call()
+        self.store.put(key, encode(response))
+        return response
+
+    def call_sync(self, request: Dict, call: Callable[[], Any], encode: Callable, decode: Callable):
+        if self.mode == "passthrough":
+            return call()
+        key, payload = self.lookup(request)
+        if payload is not None:
+            return decode(payload)
+        response = call()
+        self.store.put(key, encode(response))
+        return response
+
+
+def encode_response(response: types.GenerateContentResponse) -> Dict:
+    return response.model_dump(mode="json", exclude_none=True)
+
+
+def decode_response(payload: Dict) -> types.GenerateContentResponse:
+    return types.GenerateContentResponse.model_validate(payload)
+
+
+class ReplayModels:
+    def __init__(self, replay: GeminiReplay, get_models: Callable):
+        self.replay = replay
+        self.get_models = get_models
+
+    def generate_content(self, *, model, contents, config=None):
+        request = {"kind": "generate_content", "model": model, "contents": contents, "config": config}
+        return self.replay.call_sync(request, lambda: self.get_models().generate_content(model=model, contents=contents, config=config),
+                                     encode_response, decode_response)
+
+
+class AsyncReplayModels(ReplayModels):
+    async def generate_content(self, *, model, contents, config=None):
+        request = {"kind": "generate_content", "model": model, "contents": contents, "config": config}
+        return await self.replay.call(request, lambda: self.get_models().generate_content(model=model, contents=contents, config=config),
+                                      encode_response, decode_response)
+
+    async def generate_content_stream(self, *, model, contents, config=None):
+        request = {"kind": "generate_content_stream", "model": model, "contents": contents, "config": config}
+        key, payload = self.replay.lookup(request)
+        if payload is not None:
+            async def replayed():
+                for chunk in payload:
+                    yield decode_response(chunk)
+            return replayed()
+
+        stream = await self.get_models().generate_content_stream(model=model, contents=contents, config=config)
+
+        async def recorded():
+            chunks = []
+            async for chunk in stream:
+                chunks.append(encode_response(chunk))
+                yield chunk
+            self.replay.store.put(key, chunks) # only complete streams are stored
+        return recorded()
+
+
+class ReplayAio:
+    def __init__(self, replay: GeminiReplay, get_client: Callable):
+        self.models = AsyncReplayModels(replay, lambda: get_client().aio.models)
+
+
+class ReplayClient:
+    """Drop-in for the parts of genai.Client the agents use; the real client is only built on a recording miss."""
+    def __init__(self, replay: GeminiReplay, client_factory: Callable):
+        self.replay = replay
+        self.client_factory = client_factory
+        self.client = None
+        self.models = ReplayModels(replay, lambda: self.get_client().models)
+        self.aio = ReplayAio(replay, self.get_client)
+
+    def get_client(self):
+        if self.client is None:
+            self.client = self.client_factory()
+        return self.client
+
+
+def wrap_client(client_factory: Callable, replay: Optional[GeminiReplay] = None):
+    replay = replay or GeminiReplay()
+    if replay.mode == "passthrough":
+        return client_factory()
+    print(f"Gemini replay mode: {replay.mode}")
+    return ReplayClient(replay, client_factory)
@@ -52,7 +52,7 @@ class MCPClient:
             parts=[types.Part.from_text(text=user_prompt)]
         )
 
-        init_response = self.client.models.generate_content(
+        init_response = await self.client.aio.models.generate_content(
             model='gemini-2.0-flash-001',
             contents=[user_prompt_content],
             config=types.GenerateContentConfig(
@@ -94,7 +94,7 @@ class MCPClient:
                 parts=[function_response_part]
             )
 
-            new_response = self.client.models.generate_content(
+            new_response = await self.client.aio.models.generate_content(
                 model='gemini-2.0-flash-001',
                 contents=[
                     user_prompt_content,
@@ -118,7 +118,7 @@ class MCPClient:
     async def chat_loop(self):
         while True:
             print("============")
-            user_prompt = input("User: ").strip()
+            user_prompt = (await asyncio.to_thread(input, "User: ")).strip() # keep the loop free while waiting
             if user_prompt.lower() in ['exit', 'quit']:
                 break
 
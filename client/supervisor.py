@@ -0,0 +1,126 @@
+import asyncio
+import random
+import time
+from typing import Dict, Optional
+
+
+class ServerHealth:
+    def __init__(self):
+        self.status = "connected"
+        self.reconnects = 0
+        self.failed_pings = 0
+        self.downtime = 0.0
+        self.down_since: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.up = asyncio.Event()
+        self.up.set()
+        self.reconnect_task: Optional[asyncio.Task] = None
+
+    def current_downtime(self) -> float:
+        if self.down_since is None:
+            return self.downtime
+        return self.downtime + time.monotonic() - self.down_since
+
+
+class ConnectionSupervisor:
+    """
+    Pings every connected MCP session on a schedule and reconnects dead ones with jittered backoff.
+    While a server is reconnecting, tool calls wait up to call_deadline seconds for it (0 fails fast).
+    """
+    def __init__(self, client, supervisor_config: Optional[Dict] = None):
+        supervisor_config = supervisor_config or {}
+        self.client = client
+        self.interval = supervisor_config.get("interval", 15)
+        self.ping_timeout = supervisor_config.get("ping_timeout", 5)
+        self.backoff_initial = supervisor_config.get("backoff_initial", 0.5)
+        self.backoff_max = supervisor_config.get("backoff_max", 30)
+        self.call_deadline = supervisor_config.get("call_deadline", 10)
+
+        self.health: Dict[str, ServerHealth] = {}
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.task is None:
+            self.task = self.client.run_in_background(self.run())
+
+    async def stop(self):
+        tasks = [self.task] + [health.reconnect_task for health in self.health.values()]
+        for task in tasks:
+            if task and not task.done():
+                task.cancel()
+        await asyncio.gather(*[task for task in tasks if task], return_exceptions=True)
+        self.task = None
+
+    def connected(self, server_id: str):
+        health = self.health.setdefault(server_id, ServerHealth())
+        if health.down_since is not None:
+            health.downtime += time.monotonic() - health.down_since
+            health.down_since = None
+        health.status = "connected"
+        health.failed_pings = 0
+        health.up.set()
+
+    def mark_down(self, server_id: str, reason: str):
+        health = self.health.get(server_id)
+        if health is None or self.task is None: # never connected, or not supervising
+            return
+        health.last_error = reason
+        if health.status == "connected":
+            print(f"Server [{server_id}] is down: {reason}")
+            health.status = "reconnecting"
+            health.down_since = time.monotonic()
+            health.up.clear()
+        if health.reconnect_task is None or health.reconnect_task.done():
+            health.reconnect_task = self.client.run_in_background(self.reconnect(server_id))
+
+    async def wait_available(self, server_id: str) -> bool:
+        health = self.health.get(server_id)
+        if health is None or health.up.is_set():
+            return True
+        try:
+            await asyncio.wait_for(health.up.wait(), timeout=self.call_deadline)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            server_ids = [server_id for server_id, health in self.health.items() if health.status == "connected"]
+            await asyncio.gather(*(self.check(server_id) for server_id in server_ids))
+
+    async def check(self, server_id: str):
+        session = self.client.sessions.get(server_id)
+        if session is None:
+            self.mark_down(server_id, "session closed")
+            return
+        try:
+            await asyncio.wait_for(session.send_ping(), timeout=self.ping_timeout)
+        except Exception as e:
+            self.health[server_id].failed_pings += 1
+            self.mark_down(server_id, f"ping failed: {e!r}")
+
+    async def reconnect(self, server_id: str):
+        health = self.health[server_id]
+        delay = self.backoff_initial
+        while True:
+            await self.client.disconnect(server_id)
+            if await self.client.ensure_connected(server_id):
+                health.reconnects += 1
+                self.connected(server_id)
+                print(f"Server [{server_id}] reconnected (reconnect #{health.reconnects})")
+                return
+            await asyncio.sleep(delay * random.uniform(0.5, 1.5))
+            delay = min(delay * 2, self.backoff_max)
+
+    def stats(self) -> Dict:
+        return {
+            server_id: {
+                "status": health.status,
+                "reconnects": health.reconnects,
+                "failed_pings": health.failed_pings,
+                "downtime": round(health.current_downtime(), 3),
+                "last_error": health.last_error
+            }
+            for server_id, health in self.health.items()
+        }
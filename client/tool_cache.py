@@ -0,0 +1,66 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_BYPASS = ["run_command"] # side-effecting tools are never cached, even if listed
+
+
+def canonicalize_args(args: Any) -> Any:
+    # 2 and 2.0 from the model should hit the same entry
+    if isinstance(args, dict):
+        return {str(k): canonicalize_args(v) for k, v in args.items()}
+    if isinstance(args, (list, tuple)):
+        return [canonicalize_args(item) for item in args]
+    if isinstance(args, float) and args.is_integer():
+        return int(args)
+    return args
+
+
+class ToolResultCache:
+    """LRU cache of tool results for tools opted in through config.json, each with its own TTL."""
+    def __init__(self, cache_config: Optional[Dict] = None):
+        cache_config = cache_config or {}
+        self.max_entries = cache_config.get("max_entries", 1024)
+        self.tools: Dict[str, Dict] = cache_config.get("tools", {})
+        self.bypass = set(DEFAULT_BYPASS) | set(cache_config.get("bypass", ())) # configured names add to the defaults
+        self.entries: OrderedDict[Tuple[str, str, str], Tuple[float, Any]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def cacheable(self, tool_name: str) -> bool:
+        return tool_name in self.tools and tool_name not in self.bypass
+
+    def make_key(self, server_id: str, tool_name: str, args: Optional[Dict]) -> Tuple[str, str, str]:
+        canonical_args = json.dumps(canonicalize_args(args or {}), sort_keys=True, separators=(",", ":"), default=str)
+        return (server_id, tool_name, canonical_args)
+
+    def get(self, key: Tuple[str, str, str]) -> Tuple[bool, Any]:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return False, None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+
+    def put(self, key: Tuple[str, str, str], value: Any):
+        ttl = self.tools.get(key[1], {}).get("ttl", 60)
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
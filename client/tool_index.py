@@ -0,0 +1,89 @@
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from", "how", "i", "if", "in", "is", "it",
+    "me", "my", "of", "on", "or", "please", "the", "this", "to", "use", "what", "when", "with", "you", "your"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    text = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text or "") # camelCase -> camel Case
+    tokens = []
+    for token in re.split(r"[^a-z0-9]+", text.lower()):
+        if not token or token in STOPWORDS:
+            continue
+        if len(token) > 5 and token.endswith("ing"): # listing -> list
+            token = token[:-3]
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"): # members -> member
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def tool_document(tool) -> List[str]:
+    # name counts twice: it is the strongest signal a tool has
+    schema = tool.inputSchema or {}
+    properties = schema.get("properties", {}) if isinstance(schema, dict) else {}
+    words = [tool.name, tool.name, tool.description or ""]
+    for param_name, param_schema in properties.items():
+        words.append(param_name)
+        if isinstance(param_schema, dict):
+            words.append(param_schema.get("description", ""))
+    return tokenize(" ".join(words))
+
+
+class ToolIndex:
+    """Local BM25 index over MCP tool names, descriptions and parameter names."""
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.documents: Dict[str, Counter] = {}
+        self.lengths: Dict[str, int] = {}
+        self.document_frequency: Counter = Counter()
+
+    def add(self, tool):
+        if tool.name in self.documents:
+            self.remove(tool.name)
+        tokens = tool_document(tool)
+        self.documents[tool.name] = Counter(tokens)
+        self.lengths[tool.name] = len(tokens)
+        self.document_frequency.update(set(tokens))
+
+    def remove(self, tool_name: str):
+        counts = self.documents.pop(tool_name, None)
+        self.lengths.pop(tool_name, None)
+        if counts:
+            self.document_frequency.subtract(set(counts))
+
+    def scores(self, query: str) -> Dict[str, float]:
+        if not self.documents:
+            return {}
+        total = len(self.documents)
+        average_length = sum(self.lengths.values()) / total or 1
+        scores = {}
+        for name, counts in self.documents.items():
+            score = 0.0
+            for term in set(tokenize(query)):
+                frequency = counts.get(term, 0)
+                if not frequency:
+                    continue
+                df = self.document_frequency[term]
+                idf = math.log(1 + (total - df + 0.5) / (df + 0.5))
+                norm = frequency + self.k1 * (1 - self.b + self.b * self.lengths[name] / average_length)
+                score += idf * frequency * (self.k1 + 1) / norm
+            scores[name] = score
+        return scores
+
+    def select(self, query: str, top_k: int, pinned: Optional[Iterable[str]] = None) -> Optional[Set[str]]:
+        """Names of the top_k matching tools plus the pinned ones, or None when every tool should be sent."""
+        if len(self.documents) <= top_k:
+            return None
+        ranked = sorted(self.scores(query).items(), key=lambda item: item[1], reverse=True)
+        if not ranked or ranked[0][1] <= 0: # nothing matched, let the model see everything
+            return None
+        selected = {name for name, score in ranked[:top_k] if score > 0}
+        selected.update(name for name in pinned or [] if name in self.documents)
+        return selected
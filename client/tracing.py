@@ -0,0 +1,150 @@
+import contextvars
+import json
+import os
+import sys
+import time
+import uuid
+import argparse
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], attributes: Dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_span_id = parent_span_id
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict:
+        # field names follow the OpenTelemetry span data model
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_span_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": (self.end_ns - self.start_ns) / 1e6,
+            "attributes": self.attributes,
+            "status": {"code": "ERROR", "message": self.error} if self.error else {"code": "OK"}
+        }
+
+
+class Tracer:
+    """Writes spans for prompts, turns, LLM calls and tool calls as JSONL; a no-op without a path."""
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.file = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self.file = open(path, "a", buffering=1)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        parent = current_span.get()
+        span = Span(name, parent.trace_id if parent else uuid.uuid4().hex, parent.span_id if parent else None, attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = repr(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            try:
+                current_span.reset(token)
+            except ValueError: # generator finalized from another context
+                pass
+            if self.file:
+                self.file.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+
+def merged_duration(spans: List[Dict]) -> float:
+    # wall time covered by possibly overlapping spans, in ms
+    intervals = sorted((span["start_time_unix_nano"], span["end_time_unix_nano"]) for span in spans)
+    total, current_start, current_end = 0, None, None
+    for start, end in intervals:
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    return total / 1e6
+
+
+def summarize(path: str):
+    traces = defaultdict(list)
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                span = json.loads(line)
+                traces[span["trace_id"]].append(span)
+
+    totals = defaultdict(float)
+    per_server = defaultdict(list)
+    prompts = 0
+    print(f"{'prompt':<40} {'total':>9} {'llm':>9} {'tools':>9} {'other':>9} {'turns':>5} {'tokens':>7}")
+    for spans in traces.values():
+        root = next((span for span in spans if span["name"] == "prompt"), None)
+        if root is None:
+            continue
+        prompts += 1
+        llm_spans = [span for span in spans if span["name"] == "llm.generate"]
+        tool_spans = [span for span in spans if span["name"] == "tool.call"]
+        llm = sum(span["duration_ms"] for span in llm_spans)
+        tools = merged_duration(tool_spans)
+        total = root["duration_ms"]
+        tokens = sum(span["attributes"].get("total_token_count") or 0 for span in llm_spans)
+        for span in tool_spans:
+            per_server[span["attributes"].get("server", "?")].append(span)
+
+        totals["total"] += total
+        totals["llm"] += llm
+        totals["tools"] += tools
+        prompt = root["attributes"].get("prompt", "")[:38]
+        print(f"{prompt:<40} {total:>7.0f}ms {llm:>7.0f}ms {tools:>7.0f}ms {total - llm - tools:>7.0f}ms "
+              f"{root['attributes'].get('turns', 0):>5} {tokens:>7}")
+
+    if not prompts:
+        print("No prompt spans found")
+        return
+    print("\n" + "=" * 50)
+    print(f"{prompts} prompts, {totals['total'] / prompts:.0f}ms mean")
+    for key in ["llm", "tools"]:
+        print(f"  {key:<6} {totals[key] / totals['total']:>6.1%} of time")
+    print(f"  other  {(totals['total'] - totals['llm'] - totals['tools']) / totals['total']:>6.1%} of time")
+    print("\nTool calls by server:")
+    for server, spans in sorted(per_server.items()):
+        durations = sorted(span["duration_ms"] for span in spans)
+        errors = sum(1 for span in spans if span["status"]["code"] == "ERROR" or span["attributes"].get("error"))
+        print(f"  {server:<20} {len(spans):>5} calls  mean {sum(durations) / len(durations):>7.1f}ms  "
+              f"max {durations[-1]:>7.1f}ms  errors {errors}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Summarize where time goes per prompt')
+    parser.add_argument('path', nargs='?', default='.cache/traces.jsonl', help='Span file written by the client')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        sys.exit(f"No trace file at {args.path}")
+    summarize(args.path)
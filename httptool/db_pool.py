@@ -0,0 +1,96 @@
+import time
+import asyncio
+import sqlite3
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+import aiosqlite
+
+PRAGMAS = {
+    "journal_mode": "WAL", # readers don't block each other or the writer
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024, # KiB, per connection
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000 # ms
+}
+# What a read-only connection may do; any write, DDL, ATTACH or PRAGMA fails to prepare
+READ_ONLY_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+
+def read_only_authorizer(action, arg1, arg2, db_name, trigger):
+    if action == sqlite3.SQLITE_FUNCTION and arg2 == "load_extension":
+        return sqlite3.SQLITE_DENY
+    # opening an FTS5 table checks the schema this way; query_only still blocks any real write
+    if action == sqlite3.SQLITE_UPDATE and arg1 == "sqlite_master":
+        return sqlite3.SQLITE_OK
+    if action == sqlite3.SQLITE_PRAGMA and arg1 == "data_version" and arg2 is None:
+        return sqlite3.SQLITE_OK
+    return sqlite3.SQLITE_OK if action in READ_ONLY_ACTIONS else sqlite3.SQLITE_DENY
+
+
+class ConnectionPool:
+    """
+    A fixed set of aiosqlite connections opened once and shared by every tool call,
+    each with tuned pragmas and its own prepared statement cache.
+    """
+    def __init__(self, path: str, size: int = 4, cached_statements: int = 256,
+                 setup: Optional[Callable[[aiosqlite.Connection], Awaitable[None]]] = None, read_only: bool = False):
+        self.path = path
+        self.read_only = read_only # query_only plus an authorizer, for running SQL written by the agent
+        self.setup = setup # schema/index migrations, run once on the first connection
+        self.size = size
+        self.cached_statements = cached_statements
+        self.connections: List[aiosqlite.Connection] = []
+        self.idle: Optional[asyncio.Queue] = None
+        self.lock = asyncio.Lock()
+        self.deadlines: Dict[int, float] = {} # id(connection) -> monotonic time its statement is aborted at
+
+    async def connect(self) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.path, cached_statements=self.cached_statements)
+        db.row_factory = aiosqlite.Row
+        for name, value in PRAGMAS.items():
+            await db.execute(f"PRAGMA {name}={value}")
+        if self.read_only:
+            await db.execute("PRAGMA query_only=ON")
+            await db.set_authorizer(read_only_authorizer)
+        key = id(db)
+        # runs on the connection's thread every 10k VM steps; a nonzero return aborts the statement
+        await db.set_progress_handler(lambda: time.monotonic() > self.deadlines.get(key, float("inf")), 10000)
+        return db
+
+    async def open(self):
+        async with self.lock: # first callers race here, only one opens the pool
+            if self.idle is not None:
+                return
+            first = await self.connect()
+            if self.setup is not None:
+                await self.setup(first)
+                await first.commit()
+            self.connections = [first] + list(await asyncio.gather(*(self.connect() for _ in range(self.size - 1))))
+            self.idle = asyncio.Queue()
+            for db in self.connections:
+                self.idle.put_nowait(db)
+            print(f"Opened {self.size} connections to {self.path}")
+
+    @asynccontextmanager
+    async def acquire(self, timeout: Optional[float] = None):
+        """Borrow a connection; with a timeout, statements still running after it fail with 'interrupted'."""
+        if self.idle is None:
+            await self.open()
+        db = await self.idle.get()
+        if timeout is not None:
+            self.deadlines[id(db)] = time.monotonic() + timeout
+        try:
+            yield db
+        finally:
+            self.deadlines.pop(id(db), None)
+            if db.in_transaction: # never hand the next caller a half-finished transaction
+                await db.rollback()
+            self.idle.put_nowait(db)
+
+    async def close(self):
+        async with self.lock:
+            for db in self.connections:
+                await db.close()
+            self.connections = []
+            self.idle = None
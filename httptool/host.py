@@ -0,0 +1,72 @@
+# Single-process host: mounts any set of FastMCP server modules in one Starlette app,
+# each under its own prefix, e.g. /command/sse and /database/sse.
+import os
+import sys
+import contextlib
+import importlib.util
+from typing import List, Tuple
+from starlette.applications import Starlette
+from starlette.routing import Mount
+import uvicorn
+import argparse
+from sse_app import create_starlette_app
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SERVERS = ["command=sse_command", "database=sse_database"]
+
+
+def parse_server(spec: str) -> Tuple[str, str]:
+    """'[prefix=]module_or_path' -> (prefix, file); bare names are modules next to this file."""
+    prefix, _, target = spec.rpartition("=")
+    path = target if target.endswith(".py") else os.path.join(HERE, target + ".py")
+    path = os.path.abspath(path)
+    return prefix or os.path.splitext(os.path.basename(path))[0], path
+
+
+def load_module(path: str):
+    name = os.path.splitext(os.path.basename(path))[0]
+    if name in sys.modules:
+        return sys.modules[name]
+    directory = os.path.dirname(path)
+    if directory not in sys.path:
+        sys.path.append(directory) # the module's own sibling imports
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def create_host_app(servers: List[str], *, debug: bool = False) -> Starlette:
+    apps = {}
+    for spec in servers:
+        prefix, path = parse_server(spec)
+        module = load_module(path)
+        apps[prefix] = create_starlette_app(module.mcp._mcp_server, debug=debug, lifespan=getattr(module, "lifespan", None))
+        print(f"Mounted {os.path.basename(path)} at /{prefix}/sse and /{prefix}/mcp")
+
+    # Starlette doesn't run lifespans of mounted apps, so the host enters them all
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        async with contextlib.AsyncExitStack() as stack:
+            for sub_app in apps.values():
+                await stack.enter_async_context(sub_app.router.lifespan_context(sub_app))
+            yield
+
+    return Starlette(
+        debug=debug,
+        lifespan=lifespan,
+        routes=[Mount(f"/{prefix}", app=sub_app) for prefix, sub_app in apps.items()]
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Run several MCP servers in one process')
+    parser.add_argument('servers', nargs='*', default=DEFAULT_SERVERS,
+                        help='[prefix=]module or path to a FastMCP server file, e.g. calculator=../tool/calculator.py')
+    parser.add_argument('--host', default='localhost', help='Host to bind to')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    args = parser.parse_args()
+
+    starlette_app = create_host_app(args.servers, debug=True)
+    uvicorn.run(starlette_app, host=args.host, port=args.port)
@@ -0,0 +1,233 @@
+import asyncio
+import os
+import re
+import secrets
+import shlex
+import shutil
+import signal
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+# Each worker is one long-lived bash reading framed requests: a line with the byte length
+# of the command, then the command itself. After running it the worker prints a trailer on
+# stdout (marker, exit code, cwd, exported env) and the marker alone on stderr.
+# A "reset" line instead of a length replaces the bash with a new one with an empty env, dropping
+# every variable, function, alias and option set so far; no trailer is printed for it.
+WORKER_SCRIPT = r'''
+__MARK=$1
+while IFS= read -r __len; do
+  if [ "$__len" = reset ]; then
+    exec -c "$BASH" --noprofile --norc -c "$BASH_EXECUTION_STRING" bash "$__MARK"
+  fi
+  LC_ALL=C IFS= read -r -N "$__len" __cmd # -N counts characters, in the C locale those are bytes
+  eval "$__cmd" </dev/null
+  __rc=$?
+  printf '\n%s %d %s\n' "$__MARK" "$__rc" "$PWD"
+  export -p
+  printf '%s.end\n' "$__MARK"
+  printf '\n%s\n' "$__MARK" >&2
+done
+'''
+EXPORT_LINE = re.compile(r'declare -x ([A-Za-z_][A-Za-z0-9_]*)(?:="((?:[^"\\]|\\.)*)")?\n', re.DOTALL)
+
+OutputCallback = Callable[[str, bytes], Awaitable[None]] # ("stdout" | "stderr", chunk)
+
+
+# set by bash itself, never synced between sessions
+VOLATILE_ENV = {"PWD", "OLDPWD", "SHLVL", "_"}
+
+
+class WorkerDied(Exception):
+    def __init__(self, message: str, exit_code: int):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+def parse_exports(text: str) -> Dict[str, str]:
+    return {name: re.sub(r'\\(.)', r'\1', value or "") for name, value in EXPORT_LINE.findall(text)}
+
+
+class SessionState:
+    def __init__(self, cwd: str, env: Dict[str, str]):
+        self.cwd = cwd
+        self.env = env
+
+
+class ShellWorker:
+    def __init__(self, cwd: str):
+        self.cwd = cwd
+        self.marker = secrets.token_hex(16).encode()
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.uses = 0
+        self.state: Optional[SessionState] = None # cwd/env the shell is in right now
+        self.session_key: Optional[str] = None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            shutil.which("bash"), "--noprofile", "--norc", "-c", WORKER_SCRIPT, "bash", self.marker.decode(),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=self.cwd,
+            env=dict(os.environ),
+            start_new_session=True,
+            limit=1 << 20
+        )
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    def kill(self):
+        if self.alive:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+
+    async def read_until(self, stream: asyncio.StreamReader, end: bytes, name: str, on_output: Optional[OutputCallback]) -> bytes:
+        # passes output through as it arrives, holding back only what could be the start of the trailer
+        buffer = b""
+        while True:
+            chunk = await stream.read(65536)
+            if not chunk: # the command ran `exit` or killed its shell
+                if on_output and buffer:
+                    await on_output(name, buffer)
+                exit_code = await self.process.wait()
+                raise WorkerDied(f"shell worker exited (code {exit_code})", exit_code)
+            buffer += chunk
+            index = buffer.find(end)
+            if index >= 0:
+                if on_output and index:
+                    await on_output(name, buffer[:index])
+                return buffer[index + len(end):]
+            safe = len(buffer) - len(end)
+            if safe > 0:
+                if on_output:
+                    await on_output(name, buffer[:safe])
+                buffer = buffer[safe:]
+
+    def send(self, command: str):
+        payload = command.encode()
+        self.process.stdin.write(str(len(payload)).encode() + b"\n" + payload)
+
+    def reset(self):
+        # the new bash keeps the cwd and reads the next request; the prelude exports the next session's env
+        self.process.stdin.write(b"reset\n")
+        self.state = SessionState(self.state.cwd if self.state else self.cwd, {})
+        self.session_key = None
+
+    async def run(self, command: str, on_output: Optional[OutputCallback]) -> int:
+        self.send(command)
+        await self.process.stdin.drain()
+        self.uses += 1
+
+        results = await asyncio.gather( # both are awaited, so a second WorkerDied is not left unretrieved
+            self.read_until(self.process.stdout, b"\n" + self.marker + b" ", "stdout", on_output),
+            self.read_until(self.process.stderr, b"\n" + self.marker + b"\n", "stderr", on_output),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        trailer = results[0]
+        end = b"\n" + self.marker + b".end\n"
+        while end not in trailer:
+            chunk = await self.process.stdout.read(65536)
+            if not chunk:
+                raise WorkerDied("shell worker exited while reporting state", await self.process.wait())
+            trailer += chunk
+        status_line, _, exports = trailer[:trailer.index(end) + 1].partition(b"\n")
+        exit_code, _, cwd = status_line.decode(errors="replace").partition(" ")
+        self.state = SessionState(cwd, parse_exports(exports.decode(errors="replace")))
+        return int(exit_code)
+
+
+class ShellPool:
+    """
+    Long-lived bash workers that run commands without a fork/exec of a new shell per call.
+    Each session keeps its own cwd and exported env, restored on whichever worker runs it; a worker
+    moving to another session gets a clean bash first, so no shell variable or function carries over.
+    Workers are recycled after max_uses commands, a timeout or any failure.
+    """
+    def __init__(self, size: int = 4, max_uses: int = 500, cwd: str = "."):
+        self.size = size
+        self.max_uses = max_uses
+        self.cwd = os.path.abspath(cwd)
+        self.idle: List[ShellWorker] = []
+        self.workers: Set[ShellWorker] = set() # idle and busy, so close() can stop them all
+        self.available = asyncio.Semaphore(size)
+        self.sessions: Dict[str, SessionState] = {}
+        self.recycled = 0
+
+    @staticmethod
+    def supported() -> bool:
+        return os.name == "posix" and shutil.which("bash") is not None
+
+    async def acquire(self, session_key: str) -> ShellWorker:
+        await self.available.acquire()
+        for worker in self.idle: # prefer the worker already in this session's state
+            if worker.session_key == session_key:
+                self.idle.remove(worker)
+                return worker
+        if self.idle:
+            return self.idle.pop()
+        worker = ShellWorker(self.cwd)
+        try:
+            await worker.start()
+        except BaseException:
+            self.available.release()
+            raise
+        self.workers.add(worker)
+        return worker
+
+    def release(self, worker: ShellWorker, healthy: bool):
+        if healthy and worker.alive and worker.uses < self.max_uses:
+            self.idle.append(worker)
+        else:
+            worker.kill()
+            self.workers.discard(worker)
+            self.recycled += 1
+        self.available.release()
+
+    def prelude(self, worker: ShellWorker, session_key: str) -> str:
+        # commands that move the worker from its current state to the session's latest; the session
+        # may have changed it on another worker since this one last ran it
+        state = self.sessions.get(session_key)
+        if worker.state is state: # up to date, or a fresh worker for a new session
+            return ""
+        state = state or SessionState(self.cwd, dict(os.environ)) # new sessions start clean
+        current = worker.state.env if worker.state else dict(os.environ)
+        lines = [f"cd -- {shlex.quote(state.cwd)} 2>/dev/null"]
+        lines.extend(f"unset {name}" for name in current if name not in state.env and name not in VOLATILE_ENV)
+        lines.extend(f"export {name}={shlex.quote(value)}" for name, value in state.env.items()
+                     if current.get(name) != value and name not in VOLATILE_ENV)
+        return "\n".join(lines) + "\n"
+
+    async def run(self, command: str, session_key: str = "default", timeout: Optional[float] = None,
+                  on_output: Optional[OutputCallback] = None) -> int:
+        """Run one command, streaming output to on_output; returns the exit code, raises asyncio.TimeoutError."""
+        worker = await self.acquire(session_key)
+        healthy = False
+        try:
+            if worker.session_key is not None and worker.session_key != session_key:
+                worker.reset()
+            exit_code = await asyncio.wait_for(worker.run(self.prelude(worker, session_key) + command, on_output), timeout)
+            self.sessions[session_key] = worker.state
+            worker.session_key = session_key
+            healthy = True
+            return exit_code
+        except WorkerDied as e:
+            return e.exit_code
+        finally:
+            self.release(worker, healthy) # a timed out, cancelled or broken worker is killed, not reused
+
+    def forget(self, session_key: str):
+        self.sessions.pop(session_key, None)
+
+    async def close(self):
+        workers = list(self.workers)
+        for worker in workers: # busy ones too, their run() ends with WorkerDied
+            worker.kill()
+        await asyncio.gather(*(worker.process.wait() for worker in workers))
+        self.workers.clear()
+        self.idle.clear()
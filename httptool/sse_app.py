@@ -0,0 +1,51 @@
+import os
+import contextlib
+from mcp.server import Server
+from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from mcp.server.fastmcp.server import StreamableHTTPASGIApp
+from starlette.applications import Starlette
+from starlette.routing import Route, Mount
+from starlette.requests import Request
+
+# Stateless streamable HTTP keeps nothing between requests, so any process can serve any call;
+# per-session state such as run_command's cwd then lasts a single request
+HTTP_STATELESS = os.getenv("MCP_HTTP_STATELESS", "0") == "1"
+HTTP_JSON_RESPONSE = os.getenv("MCP_HTTP_JSON_RESPONSE", "0") == "1" # plain JSON replies, without progress notifications
+
+
+def create_starlette_app(mcp_server: Server, *, debug: bool = False, lifespan=None, messages_path: str = "/messages/") -> Starlette:
+    # The endpoint sent to clients includes the mount's root_path, so the app also works under a prefix
+    sse = SseServerTransport(messages_path)
+    session_manager = StreamableHTTPSessionManager(app=mcp_server, stateless=HTTP_STATELESS, json_response=HTTP_JSON_RESPONSE)
+
+    async def handle_sse(request: Request) -> None:
+        async with sse.connect_sse(
+            request.scope,
+            request.receive,
+            request._send
+        ) as (read_stream, write_stream):
+            await mcp_server.run(
+                read_stream,
+                write_stream,
+                mcp_server.create_initialization_options()
+            )
+
+    @contextlib.asynccontextmanager
+    async def app_lifespan(app: Starlette):
+        async with session_manager.run():
+            if lifespan is None:
+                yield
+            else:
+                async with lifespan(app):
+                    yield
+
+    return Starlette(
+        debug=debug,
+        lifespan=app_lifespan,
+        routes=[
+            Route("/sse", endpoint=handle_sse),
+            Mount(messages_path, app=sse.handle_post_message),
+            Route("/mcp", endpoint=StreamableHTTPASGIApp(session_manager)) # streamable HTTP, a Mount would redirect /mcp to /mcp/
+        ]
+    )
@@ -1,26 +1,122 @@
 import os
-import subprocess
-from mcp.server.fastmcp import FastMCP
-from mcp.server import Server
-from mcp.server.sse import SseServerTransport
-from starlette.applications import Starlette
-from starlette.routing import Route, Mount
-from starlette.requests import Request
+import time
+import signal
+import asyncio
+import uuid
+import weakref
+import contextlib
+from mcp.server.fastmcp import FastMCP, Context
 import uvicorn
 import argparse
+from sse_app import create_starlette_app
+from sse_router import create_router_app
+from shell_pool import ShellPool
 
 
 mcp = FastMCP("terminal")
 DEFAULT_WORKSPACE = os.path.expanduser(".")
+COMMAND_TIMEOUT = float(os.getenv("COMMAND_TIMEOUT", "60")) # seconds, per call
+OUTPUT_LIMIT = int(os.getenv("COMMAND_OUTPUT_LIMIT", str(64 * 1024))) # bytes kept from the start of each stream
+OUTPUT_TAIL = 4 * 1024 # bytes from the end of a truncated stream, where errors usually are
+PROGRESS_INTERVAL = 0.2 # seconds between partial output notifications
+SHELL_POOL_SIZE = int(os.getenv("COMMAND_SHELL_POOL", "0")) # warm bash workers, 0 forks a shell per call
+SHELL_POOL_MAX_USES = int(os.getenv("COMMAND_SHELL_POOL_MAX_USES", "500")) # commands before a worker is replaced
+SHELL_POOL = ShellPool(SHELL_POOL_SIZE, SHELL_POOL_MAX_USES, DEFAULT_WORKSPACE) if SHELL_POOL_SIZE > 0 and ShellPool.supported() else None
+SESSION_KEYS = weakref.WeakKeyDictionary() # MCP session -> pool session key, keeps cwd/env per client
+
+class OutputBuffer:
+    """Keeps the first `limit` bytes of a stream and the last `tail_limit`; the middle is only counted."""
+    def __init__(self, limit: int, tail_limit: int = OUTPUT_TAIL):
+        self.limit = limit
+        self.tail_limit = tail_limit
+        self.head = bytearray()
+        self.tail = bytearray()
+        self.total = 0
+
+    def write(self, data: bytes):
+        self.total += len(data)
+        room = self.limit - len(self.head)
+        if room > 0:
+            self.head.extend(data[:room])
+            data = data[room:]
+        if data:
+            self.tail.extend(data)
+            del self.tail[:-self.tail_limit] # a ring of the latest bytes
+
+    def text(self) -> str:
+        omitted = self.total - len(self.head) - len(self.tail)
+        if omitted == 0:
+            return (self.head + self.tail).decode(errors="replace")
+        return self.head.decode(errors="replace") + f"\n[output truncated: {omitted} bytes omitted]\n" + self.tail.decode(errors="replace")
+
+
+async def pump(stream: asyncio.StreamReader, buffer: OutputBuffer, on_chunk):
+    while True:
+        chunk = await stream.read(4096)
+        if not chunk:
+            return
+        buffer.write(chunk)
+        await on_chunk(chunk)
+
+
+def kill_process(process: asyncio.subprocess.Process):
+    if process.returncode is not None:
+        return
+    try:
+        if os.name == "posix":
+            os.killpg(process.pid, signal.SIGKILL) # the shell and everything it started
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+
+
+def session_key(ctx: Context) -> str:
+    if ctx is None:
+        return "default"
+    session = ctx.session
+    if session not in SESSION_KEYS:
+        SESSION_KEYS[session] = uuid.uuid4().hex
+        weakref.finalize(session, SHELL_POOL.forget, SESSION_KEYS[session])
+    return SESSION_KEYS[session]
+
+
+async def run_pooled(command: str, timeout: float, ctx: Context, stdout: OutputBuffer, stderr: OutputBuffer, on_chunk):
+    async def on_output(name: str, chunk: bytes):
+        (stdout if name == "stdout" else stderr).write(chunk)
+        await on_chunk(chunk)
+
+    await SHELL_POOL.run(command, session_key(ctx), timeout, on_output)
+
+
+async def run_forked(command: str, timeout: float, stdout: OutputBuffer, stderr: OutputBuffer, on_chunk):
+    process = await asyncio.create_subprocess_shell(
+        command,
+        cwd=DEFAULT_WORKSPACE,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=os.name == "posix"
+    )
+
+    async def communicate():
+        await asyncio.gather(pump(process.stdout, stdout, on_chunk), pump(process.stderr, stderr, on_chunk))
+        await process.wait()
+
+    try:
+        await asyncio.wait_for(communicate(), timeout=timeout)
+    finally:
+        kill_process(process) # also on timeout and on cancellation by the client
+
 
 @mcp.tool()
-async def run_command(command: str) -> str:
+async def run_command(command: str, timeout: float = COMMAND_TIMEOUT, ctx: Context = None) -> str:
     """
     Execute shell or terminal commands using this tool.
 
     Use it when the user requests to run, test, or inspect something via the command line—such as listing files, checking versions, installing packages, or running scripts.
 
-    Input: A single shell command as a string.
+    Input: A single shell command as a string, and optionally a timeout in seconds.
 
     Examples:
         - "ls -la"
@@ -28,17 +124,42 @@ async def run_command(command: str) -> str:
         - "ping google.com"
         - "echo Hello, World"
     """
+    stdout = OutputBuffer(OUTPUT_LIMIT)
+    stderr = OutputBuffer(OUTPUT_LIMIT)
+    last_report = 0.0
+    pending = []
+
+    async def report():
+        nonlocal last_report
+        last_report = time.monotonic()
+        message = b"".join(pending).decode(errors="replace")
+        pending.clear()
+        try:
+            await ctx.report_progress(stdout.total + stderr.total, None, message)
+        except Exception:
+            pass
+
+    async def on_chunk(chunk: bytes): # partial output goes out as progress notifications
+        if ctx is None:
+            return
+        pending.append(chunk)
+        if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+            await report()
+
     try:
-        result = subprocess.run(
-            command,
-            shell=True,
-            cwd=DEFAULT_WORKSPACE,
-            capture_output=True,
-            text=True
-        )
-        return result.stdout or result.stderr
-    except Exception as e:
+        if SHELL_POOL is not None:
+            await run_pooled(command, timeout, ctx, stdout, stderr, on_chunk)
+        else:
+            await run_forked(command, timeout, stdout, stderr, on_chunk)
+    except asyncio.TimeoutError:
+        return (stdout.text() or stderr.text()) + f"\n[command timed out after {timeout}s and was killed]"
+    except OSError as e:
         return str(e)
+    finally:
+        if pending: # the output that came after the last notification
+            await report()
+
+    return stdout.text() or stderr.text()
 
 @mcp.tool()
 async def add_numbers(a: float, b: float) -> float:
@@ -54,28 +175,13 @@ async def add_numbers(a: float, b: float) -> float:
     """
     return a + b
 
-def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlette:
-    sse = SseServerTransport("/messages/")
-
-    async def handle_sse(request: Request) -> None:
-        async with sse.connect_sse(
-            request.scope,
-            request.receive,
-            request._send
-        ) as (read_stream, write_stream):
-            await mcp_server.run(
-                read_stream,
-                write_stream,
-                mcp_server.create_initialization_options()
-            )
-
-    return Starlette(
-        debug=debug,
-        routes=[
-            Route("/sse", endpoint=handle_sse),
-            Mount("/messages/", app=sse.handle_post_message)
-        ]
-    )
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    try:
+        yield
+    finally:
+        if SHELL_POOL is not None:
+            await SHELL_POOL.close()
 
 
 if __name__ == "__main__":
@@ -84,7 +190,14 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Run MCP server')
     parser.add_argument('--host', default='localhost', help='Host to bind to')
     parser.add_argument('--port', type=int, default=8000, help='Port to listen on')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes behind a session-aware router')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS) # set by the router on its workers
     args = parser.parse_args()
 
-    starlette_app = create_starlette_app(mcp_server, debug=True)
+    if args.workers > 1:
+        starlette_app = create_router_app(os.path.abspath(__file__), args.workers, debug=True)
+    elif args.worker is not None:
+        starlette_app = create_starlette_app(mcp_server, debug=True, lifespan=lifespan, messages_path=f"/messages/{args.worker}/")
+    else:
+        starlette_app = create_starlette_app(mcp_server, debug=True, lifespan=lifespan)
     uvicorn.run(starlette_app, host=args.host, port=args.port)
@@ -1,69 +1,265 @@
 import os
+import json
+import base64
+import hashlib
+import contextlib
 from mcp.server.fastmcp import FastMCP
-from mcp.server import Server
-from mcp.server.sse import SseServerTransport
-import aiosqlite
-from starlette.applications import Starlette
-from starlette.routing import Route, Mount
-from starlette.requests import Request
 import uvicorn
 import argparse
+from sse_app import create_starlette_app
+from db_pool import ConnectionPool
 
 
 mcp = FastMCP("terminal")
 DEFAULT_WORKSPACE = os.path.expanduser(".")
+DB_PATH = os.getenv("VIMES_DB_PATH", "db/vimes.db")
+DB_POOL_SIZE = int(os.getenv("VIMES_DB_POOL_SIZE", "4")) # connections shared by all tool calls
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 200
+QUERY_PAGE_SIZE = 100
+QUERY_MAX_BYTES = int(os.getenv("VIMES_QUERY_MAX_BYTES", str(16 * 1024))) # per page of query_database
+QUERY_TIMEOUT = float(os.getenv("VIMES_QUERY_TIMEOUT", "10")) # seconds before query_database gives up
+MAX_CELL = 1024 # characters kept per value
+
+# Trigram index over members.name, kept in sync by triggers, so substring search doesn't scan the table
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS members_fts USING fts5(name, content='members', content_rowid='id', tokenize='trigram');
+CREATE TRIGGER IF NOT EXISTS members_fts_insert AFTER INSERT ON members BEGIN
+    INSERT INTO members_fts(rowid, name) VALUES (new.id, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS members_fts_delete AFTER DELETE ON members BEGIN
+    INSERT INTO members_fts(members_fts, rowid, name) VALUES ('delete', old.id, old.name);
+END;
+CREATE TRIGGER IF NOT EXISTS members_fts_update AFTER UPDATE OF name ON members BEGIN
+    INSERT INTO members_fts(members_fts, rowid, name) VALUES ('delete', old.id, old.name);
+    INSERT INTO members_fts(rowid, name) VALUES (new.id, new.name);
+END;
+"""
+# Matches are ranked by where the name contains the query (earlier first), then by length.
+# Only the first RANK_WINDOW candidates are ranked, so a common query never sorts the whole table.
+RANK_WINDOW = 2000
+SEARCH_QUERY = """
+SELECT m.name FROM (SELECT rowid FROM members_fts WHERE members_fts MATCH ? LIMIT ?) f
+JOIN members m ON m.id = f.rowid
+ORDER BY instr(lower(m.name), lower(?)), length(m.name) LIMIT ?
+"""
+# Trigrams need at least 3 characters, so shorter names fall back to a scan that stops at the window
+SHORT_QUERY = """
+SELECT name FROM (SELECT name FROM members WHERE name LIKE ? ESCAPE '\\' COLLATE NOCASE LIMIT ?)
+ORDER BY instr(lower(name), lower(?)), length(name) LIMIT ?
+"""
+ALL_QUERY = "SELECT name FROM members ORDER BY id LIMIT ?"
+
+
+async def create_search_index(db):
+    cursor = await db.execute("SELECT 1 FROM sqlite_master WHERE name = 'members_fts'")
+    exists = await cursor.fetchone() is not None
+    await db.executescript(SEARCH_SCHEMA)
+    if not exists: # index the rows that were there before the triggers
+        await db.execute("INSERT INTO members_fts(members_fts) VALUES ('rebuild')")
+        print("Built members_fts search index")
+
+
+async def search_members(db, name: str, limit: int) -> list:
+    window = max(RANK_WINDOW, limit)
+    if not name:
+        cursor = await db.execute(ALL_QUERY, (limit,))
+    elif len(name) < 3:
+        pattern = "%" + name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        cursor = await db.execute(SHORT_QUERY, (pattern, window, name, limit))
+    else:
+        phrase = '"' + name.replace('"', '""') + '"' # a literal substring, not FTS query syntax
+        cursor = await db.execute(SEARCH_QUERY, (phrase, window, name, limit))
+    return [row["name"] for row in await cursor.fetchall()]
+
+
+def quote_identifier(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def encode_key_value(value):
+    # key values go into the cursor as they are, bytes tagged so they seek as a BLOB again
+    return {"b": base64.b64encode(value).decode()} if isinstance(value, bytes) else value
+
+
+def decode_key_value(value):
+    if isinstance(value, dict):
+        return base64.b64decode(value["b"])
+    return value
+
+
+def encode_cursor(state: dict) -> str:
+    if "after" in state:
+        state = {**state, "after": [encode_key_value(v) for v in state["after"]]}
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor: str, key: list) -> dict:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(state, dict):
+            raise ValueError("not an object")
+        if "after" in state:
+            if not isinstance(state["after"], list) or len(state["after"]) != len(key):
+                raise ValueError("bad after")
+            state["after"] = [decode_key_value(v) for v in state["after"]]
+        if not isinstance(state.get("offset", 0), int) or state.get("offset", 0) < 0:
+            raise ValueError("bad offset")
+    except (KeyError, TypeError) as e:
+        raise ValueError(str(e))
+    return state
+
+
+def cell(value):
+    if isinstance(value, bytes):
+        value = base64.b64encode(value).decode()
+    if isinstance(value, str) and len(value) > MAX_CELL:
+        return value[:MAX_CELL] + f"...[{len(value) - MAX_CELL} more chars]"
+    return value
+
+
+def seek_condition(key: list, after: list):
+    # rows after `after` in ORDER BY key (NULLs first), spelled out so NULL keys compare too
+    terms, params = [], []
+    for i, value in enumerate(after):
+        term = [f"{quote_identifier(k)} IS ?" for k in key[:i]]
+        params.extend(after[:i])
+        if value is None:
+            term.append(f"{quote_identifier(key[i])} IS NOT NULL")
+        else:
+            term.append(f"{quote_identifier(key[i])} > ?")
+            params.append(value)
+        terms.append("(" + " AND ".join(term) + ")")
+    return " OR ".join(terms), params
+
+
+def page_query(sql: str, key: list, state: dict, page_size: int):
+    # the agent's query becomes a subquery; keyset pages continue after the last key seen
+    params = []
+    query = f"SELECT * FROM ({sql}\n)" # the newline ends a trailing -- comment
+    if key:
+        columns = ", ".join(quote_identifier(k) for k in key)
+        if "after" in state:
+            condition, seek_params = seek_condition(key, state["after"])
+            query += f" WHERE {condition}"
+            params.extend(seek_params)
+        query += f" ORDER BY {columns} LIMIT ?"
+        params.append(page_size + 1)
+    else: # no key to seek on, fall back to an offset
+        query += " LIMIT ? OFFSET ?"
+        params.extend([page_size + 1, state.get("offset", 0)])
+    return query, params
+
+
+async def run_page(sql: str, key: list, state: dict, page_size: int, max_bytes: int) -> dict:
+    query, params = page_query(sql, key, state, page_size)
+    async with reader.acquire(timeout=QUERY_TIMEOUT) as db:
+        cursor = await db.execute(query, params)
+        rows = await cursor.fetchall()
+        columns = [d[0] for d in cursor.description]
+    missing = [k for k in key if k not in columns]
+    if missing:
+        raise KeyError(f"key column {', '.join(missing)} not in the result columns {columns}")
+
+    page, size = [], 0
+    for row in rows[:page_size]: # stop early once the encoded page would pass max_bytes
+        values = [cell(v) for v in row]
+        size += len(json.dumps(values, separators=(",", ":")))
+        if page and size > max_bytes:
+            break
+        page.append(values)
+    more = len(page) < len(rows)
+
+    next_cursor = None
+    if more:
+        if key:
+            last = rows[len(page) - 1] # raw values, page cells may be truncated or base64
+            next_state = {"after": [last[columns.index(k)] for k in key]}
+        else:
+            next_state = {"offset": state.get("offset", 0) + len(page)}
+        next_cursor = encode_cursor({**next_state, "q": state["q"]})
+    return {
+        "columns": columns,
+        "data": [list(column) for column in zip(*page)] if page else [[] for _ in columns],
+        "rows": len(page),
+        "next_cursor": next_cursor
+    }
+
+
+pool = ConnectionPool(DB_PATH, DB_POOL_SIZE, setup=create_search_index)
+reader = ConnectionPool(DB_PATH, DB_POOL_SIZE, read_only=True) # for SQL written by the agent
 
 
 @mcp.tool()
-async def vimes_lab_members(name: str) -> str:
+async def vimes_lab_members(name: str, limit: int = DEFAULT_LIMIT) -> str:
     """
-    Query Vimes Lab members by partial name (case-insensitive).
-    If name is empty, return all members.
+    Query Vimes Lab members by partial name (case-insensitive), best matches first.
+    If name is empty, return the first members.
 
     Args:
         name (str): Partial name to search for (can be empty)
+        limit (int): Maximum number of members to return (default 20, at most 200)
 
     Returns:
         str: Matching members' names
     """
+    limit = max(1, min(limit, MAX_LIMIT))
     try:
-        async with aiosqlite.connect("db/vimes.db") as db:
-            db.row_factory = aiosqlite.Row
-
-            cursor = await db.execute(
-                "SELECT name FROM members WHERE name LIKE ? COLLATE NOCASE",(f"%{name}%",)
-            )
-
-            rows = await cursor.fetchall()
-            if rows:
-                return "\n".join(r["name"] for r in rows)
-            else:
-                return "No matching member found."
+        async with pool.acquire() as db:
+            names = await search_members(db, name.strip(), limit + 1)
     except Exception as e:
         return f"Database error: {e}"
 
-def create_starlette_app(mcp_server: Server, *, debug: bool = False) -> Starlette:
-    sse = SseServerTransport("/messages/")
-
-    async def handle_sse(request: Request) -> None:
-        async with sse.connect_sse(
-            request.scope,
-            request.receive,
-            request._send
-        ) as (read_stream, write_stream):
-            await mcp_server.run(
-                read_stream,
-                write_stream,
-                mcp_server.create_initialization_options()
-            )
-
-    return Starlette(
-        debug=debug,
-        routes=[
-            Route("/sse", endpoint=handle_sse),
-            Mount("/messages/", app=sse.handle_post_message)
-        ]
-    )
+    if not names:
+        return "No matching member found."
+    if len(names) > limit:
+        return "\n".join(names[:limit]) + f"\n(first {limit} matches shown, more exist)"
+    return "\n".join(names)
+
+@mcp.tool()
+async def query_database(sql: str, key: str = "", cursor: str = "", page_size: int = QUERY_PAGE_SIZE) -> str:
+    """
+    Run a read-only SQL SELECT on the Vimes Lab database and get one page of the result.
+    Tables can be listed with: SELECT name, sql FROM sqlite_master WHERE type = 'table'
+
+    Args:
+        sql (str): A single SELECT statement; writes, PRAGMA and ATTACH are rejected
+        key (str): Comma-separated result column(s) that uniquely order rows, e.g. "id"; pages seek on them
+        cursor (str): next_cursor from the previous page to continue, empty for the first page
+        page_size (int): Maximum rows per page (default 100); pages are also cut to stay under a byte budget
+
+    Returns:
+        str: Compact JSON {"columns": [...], "data": [[column values]...], "rows": n, "next_cursor": str or null}
+    """
+    sql = sql.strip().rstrip(";")
+    key = [k.strip() for k in key.split(",") if k.strip()]
+    fingerprint = hashlib.sha1(json.dumps([sql, key]).encode()).hexdigest()[:12]
+    try:
+        state = decode_cursor(cursor, key) if cursor else {"q": fingerprint}
+    except ValueError:
+        return "Invalid cursor."
+    if state.get("q") != fingerprint:
+        return "This cursor belongs to a different query; pass the same sql and key."
+
+    try:
+        page = await run_page(sql, key, state, max(1, min(page_size, 1000)), QUERY_MAX_BYTES)
+    except KeyError as e:
+        return f"Query error: {e.args[0]}"
+    except Exception as e:
+        if str(e) == "interrupted":
+            return f"Query error: stopped after {QUERY_TIMEOUT}s, narrow it down or add a LIMIT"
+        return f"Query error: {e}"
+    return json.dumps(page, separators=(",", ":"))
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    await pool.open() # connections are ready before the first request
+    await reader.open()
+    try:
+        yield
+    finally:
+        await reader.close()
+        await pool.close()
 
 
 if __name__ == "__main__":
@@ -72,7 +268,12 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Run MCP server')
     parser.add_argument('--host', default='localhost', help='Host to bind to')
     parser.add_argument('--port', type=int, default=8001, help='Port to listen on')
+    parser.add_argument('--db', default=DB_PATH, help='SQLite database file')
+    parser.add_argument('--pool-size', type=int, default=DB_POOL_SIZE, help='Database connections to keep open')
     args = parser.parse_args()
 
-    starlette_app = create_starlette_app(mcp_server, debug=True)
+    pool = ConnectionPool(args.db, args.pool_size, setup=create_search_index)
+    reader = ConnectionPool(args.db, args.pool_size, read_only=True)
+
+    starlette_app = create_starlette_app(mcp_server, debug=True, lifespan=lifespan)
     uvicorn.run(starlette_app, host=args.host, port=args.port)
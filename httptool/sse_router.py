@@ -0,0 +1,204 @@
+# Multi-worker mode for the SSE servers: N worker processes behind one router.
+# Worker i announces /messages/{i}/ as its message endpoint, so every POST carries
+# the index of the worker that owns its SSE stream and needs no shared state.
+import os
+import sys
+import time
+import socket
+import asyncio
+import itertools
+import subprocess
+import contextlib
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import httpx
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, StreamingResponse
+from starlette.routing import Route
+
+HOP_HEADERS = {"connection", "keep-alive", "transfer-encoding", "upgrade", "host"}
+SESSION_HEADER = "mcp-session-id"
+SESSION_TTL = float(os.getenv("MCP_ROUTER_SESSION_TTL", "3600")) # idle seconds before a session's route is dropped
+MAX_SESSIONS = int(os.getenv("MCP_ROUTER_MAX_SESSIONS", "100000"))
+STOP_TIMEOUT = 10 # seconds a worker gets to exit before it is killed
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) == 0:
+                return
+        time.sleep(0.1)
+    raise TimeoutError(f"Worker on port {port} did not start")
+
+
+def spawn_workers(script: str, workers: int, extra_args: List[str]) -> Dict[int, tuple]:
+    """Start `script --worker i --port p` for each worker; returns {i: (port, process)}."""
+    started = {}
+    for index in range(workers):
+        port = free_port()
+        process = subprocess.Popen([sys.executable, script, "--host", "127.0.0.1", "--port", str(port), "--worker", str(index), *extra_args])
+        started[index] = (port, process)
+    for port, _ in started.values():
+        wait_for_port(port)
+    return started
+
+
+class SessionRoutes:
+    """
+    Streamable HTTP session id -> worker that created it. Sessions idle for `ttl` seconds are
+    forgotten, oldest first and at most `max_sessions` kept, except while a GET stream is open.
+    """
+    def __init__(self, ttl: float = SESSION_TTL, max_sessions: int = MAX_SESSIONS):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.routes: OrderedDict[str, list] = OrderedDict() # id -> [worker, last used, open streams]
+
+    def __len__(self) -> int:
+        return len(self.routes)
+
+    def get(self, session_id: str) -> Optional[int]:
+        self.prune()
+        route = self.routes.get(session_id)
+        if route is None:
+            return None
+        self.touch(session_id)
+        return route[0]
+
+    def set(self, session_id: str, index: int):
+        self.routes.setdefault(session_id, [index, 0.0, 0])[0] = index
+        self.touch(session_id)
+        self.prune()
+
+    def touch(self, session_id: str):
+        self.routes[session_id][1] = time.monotonic()
+        self.routes.move_to_end(session_id)
+
+    def stream(self, session_id: str, delta: int):
+        route = self.routes.get(session_id)
+        if route is not None:
+            route[2] += delta
+            self.touch(session_id)
+
+    def pop(self, session_id: str):
+        self.routes.pop(session_id, None)
+
+    def prune(self):
+        now = time.monotonic()
+        for _ in range(len(self.routes)):
+            session_id, (_, last_used, streams) = next(iter(self.routes.items()))
+            if len(self.routes) <= self.max_sessions and now - last_used < self.ttl:
+                return
+            if streams > 0: # still in use, look at it again later
+                self.touch(session_id)
+                continue
+            self.routes.popitem(last=False)
+
+
+def create_router_app(script: str, workers: int, extra_args: List[str] = (), *, debug: bool = False) -> Starlette:
+    state = {"workers": {}, "clients": {}, "streams": {}}
+    mcp_sessions = SessionRoutes()
+    round_robin = itertools.count()
+
+    async def forward(request: Request, index: int, stream: bool = False):
+        client = state["clients"][index]
+        if stream:
+            state["streams"][index] += 1 # counted at once, so concurrent connects spread out
+        headers = [(k, v) for k, v in request.headers.raw if k.decode().lower() not in HOP_HEADERS]
+        upstream = client.build_request(request.method, request.url.path, params=request.url.query,
+                                        headers=headers, content=request.stream())
+        try:
+            response = await client.send(upstream, stream=True)
+        except httpx.TransportError as e:
+            if stream:
+                state["streams"][index] -= 1
+            return PlainTextResponse(f"worker {index} unavailable: {e}", status_code=502)
+
+        session_id = response.headers.get(SESSION_HEADER)
+        if session_id:
+            mcp_sessions.set(session_id, index)
+        requested = request.headers.get(SESSION_HEADER)
+        if requested and (request.method == "DELETE" or response.status_code == 404): # ended, or the worker no longer has it
+            mcp_sessions.pop(requested)
+        streamed_session = requested if stream and request.method == "GET" else None
+        if streamed_session:
+            mcp_sessions.stream(streamed_session, 1)
+
+        async def body():
+            try:
+                async for chunk in response.aiter_raw():
+                    yield chunk
+            finally:
+                if stream:
+                    state["streams"][index] -= 1
+                if streamed_session:
+                    mcp_sessions.stream(streamed_session, -1)
+
+        return StreamingResponse(
+            body(),
+            status_code=response.status_code,
+            headers={k: v for k, v in response.headers.items() if k.lower() not in HOP_HEADERS},
+            background=BackgroundTask(response.aclose)
+        )
+
+    async def stop_worker(process: subprocess.Popen):
+        process.terminate()
+        try:
+            await asyncio.to_thread(process.wait, STOP_TIMEOUT) # off the event loop
+        except subprocess.TimeoutExpired:
+            process.kill()
+            await asyncio.to_thread(process.wait)
+
+    async def handle_sse(request: Request):
+        index = min(state["streams"], key=state["streams"].get) # fewest open SSE streams
+        return await forward(request, index, stream=True)
+
+    async def handle_messages(request: Request):
+        index = int(request.path_params["worker"])
+        if index not in state["clients"]:
+            return PlainTextResponse("Unknown worker", status_code=404)
+        return await forward(request, index)
+
+    async def handle_mcp(request: Request):
+        # stateful streamable HTTP sticks to the worker holding the session; new or stateless requests rotate
+        index = mcp_sessions.get(request.headers.get(SESSION_HEADER, ""))
+        if index is None:
+            index = next(round_robin) % workers
+        return await forward(request, index, stream=request.method == "GET")
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        state["workers"] = await asyncio.to_thread(spawn_workers, script, workers, list(extra_args))
+        for index, (port, _) in state["workers"].items():
+            state["clients"][index] = httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}",
+                timeout=httpx.Timeout(30, read=None), # SSE streams stay open
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=64)
+            )
+            state["streams"][index] = 0
+        print(f"Routing to {workers} workers on ports {[port for port, _ in state['workers'].values()]}")
+        try:
+            yield
+        finally:
+            for client in state["clients"].values():
+                await client.aclose()
+            await asyncio.gather(*(stop_worker(process) for _, process in state["workers"].values()))
+
+    return Starlette(
+        debug=debug,
+        lifespan=lifespan,
+        routes=[
+            Route("/sse", endpoint=handle_sse),
+            Route("/messages/{worker:int}/", endpoint=handle_messages, methods=["POST"]),
+            Route("/mcp", endpoint=handle_mcp, methods=["GET", "POST", "DELETE"])
+        ]
+    )
@@ -0,0 +1,7 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for directory in ("client", "httptool", "tool"): # the scripts import their siblings by bare name
+    sys.path.insert(0, os.path.join(ROOT, directory))
+os.environ.setdefault("GEMINI_API_KEY", "offline-test") # nothing here reaches Gemini
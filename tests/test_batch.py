@@ -0,0 +1,23 @@
+import asyncio
+import json
+
+from batch import run_batch
+
+
+class FakeClient:
+    async def process_stream(self, prompt, stream=False):
+        yield {"type": "done", "text": prompt.upper(), "turns": 1}
+
+
+def test_malformed_line_fails_only_itself(tmp_path):
+    input_path = tmp_path / "prompts.jsonl"
+    output_path = tmp_path / "results.jsonl"
+    input_path.write_text('{"id": "a", "prompt": "one"}\n{"id": "b", "prompt": \n[1, 2]\n{"id": "c", "prompt": "three"}\n')
+
+    counts = asyncio.run(run_batch(FakeClient(), str(input_path), str(output_path), concurrency=2))
+
+    records = {record["id"]: record for record in map(json.loads, output_path.read_text().splitlines())}
+    assert counts == {"done": 2, "failed": 2, "skipped": 0}
+    assert records["a"]["response"] == "ONE" and records["c"]["response"] == "THREE"
+    assert "Invalid JSON on line 2" in records["2"]["error"]
+    assert "Invalid JSON on line 3" in records["3"]["error"]
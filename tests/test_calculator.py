@@ -0,0 +1,15 @@
+import asyncio
+import json
+
+import calculator
+
+
+def test_batch_keeps_going_past_a_deeply_nested_expression(monkeypatch):
+    async def calculate_batch_with_llm(expressions):
+        return [ValueError("no answer")] * len(expressions)
+
+    monkeypatch.setattr(calculator, "calculate_batch_with_llm", calculate_batch_with_llm)
+    deep = "-" * 999 + "1"
+    outcomes = json.loads(asyncio.run(calculator.ai_calculator_batch(["1 + 1", deep])))
+    assert outcomes[0] == {"expression": "1 + 1", "result": "3"}
+    assert outcomes[1]["expression"] == deep and "error" in outcomes[1]
@@ -0,0 +1,68 @@
+import asyncio
+
+from client import MCPClient
+
+
+class FakeSession:
+    async def send_ping(self):
+        pass
+
+
+def make_client(config=None):
+    client = MCPClient({"supervisor": {"enabled": True, "backoff_initial": 0.01}, **(config or {})})
+    connects = []
+
+    async def connect_to_server(server_config, server_id):
+        connects.append(server_id)
+        client.server_configs[server_id] = server_config
+        client.sessions[server_id] = FakeSession()
+        client.supervisor.connected(server_id)
+        return True
+
+    client.connect_to_server = connect_to_server
+    return client, connects
+
+
+def test_cached_server_reconnects_after_drop():
+    async def main():
+        client, connects = make_client()
+        client.server_configs["db"] = {"url": "http://localhost/sse"}
+        # started from the manifest cache and connected in the background
+        client.connect_tasks["db"] = client.run_in_background(client.connect_to_server(client.server_configs["db"], "db"))
+        await client.connect_tasks["db"]
+
+        await client.disconnect("db") # the server dropped
+        await asyncio.wait_for(client.supervisor.reconnect("db"), timeout=5)
+
+        assert connects == ["db", "db"]
+        assert "db" in client.sessions
+        assert client.supervisor.health["db"].reconnects == 1
+    asyncio.run(main())
+
+
+def test_stale_connect_task_without_session():
+    async def main():
+        client, connects = make_client()
+        client.server_configs["db"] = {"url": "http://localhost/sse"}
+        client.connect_tasks["db"] = client.run_in_background(client.connect_to_server(client.server_configs["db"], "db"))
+        await client.connect_tasks["db"]
+        client.sessions.pop("db") # closed on its own, the finished task still says True
+
+        assert await client.ensure_connected("db") is True
+        assert connects == ["db", "db"]
+        assert "db" in client.sessions
+    asyncio.run(main())
+
+
+def test_cancelled_connect_task():
+    async def main():
+        client, connects = make_client()
+        client.server_configs["db"] = {"url": "http://localhost/sse"}
+        task = client.run_in_background(asyncio.sleep(10))
+        client.connect_tasks["db"] = task
+        waiter = asyncio.create_task(client.ensure_connected("db"))
+        await asyncio.sleep(0)
+        task.cancel()
+        assert await waiter is False
+        assert await client.ensure_connected("db") is True # the next call connects again
+    asyncio.run(main())
@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import httpx
+from starlette.requests import Request
+from starlette.testclient import TestClient
+
+from client import add_json_role
+from gateway import create_gateway_app
+
+
+def make_app(max_active=1):
+    app = create_gateway_app({"servers": [], "gateway": {"max_active": max_active, "max_queued": 0}})
+    return app, app.state.client
+
+
+def test_busy_conversation_does_not_use_up_admission():
+    app, client = make_app(max_active=2)
+    release = asyncio.Event()
+
+    async def process(prompt, history):
+        if prompt == "slow":
+            await release.wait()
+        return prompt
+
+    client.process = process
+    app.state.store.create("busy")
+    app.state.store.create("other")
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://gateway") as http:
+            slow = asyncio.create_task(http.post("/conversations/busy/messages", json={"prompt": "slow"}))
+            queued = asyncio.create_task(http.post("/conversations/busy/messages", json={"prompt": "next"}))
+            await asyncio.sleep(0.05)
+            other = await http.post("/conversations/other/messages", json={"prompt": "hi"})
+            assert other.status_code == 200 # the prompt waiting on "busy" holds no slot
+            release.set()
+            assert [(await task).json()["response"] for task in (slow, queued)] == ["slow", "next"]
+    asyncio.run(main())
+
+
+def test_unknown_conversation_is_404():
+    app, _ = make_app()
+    with TestClient(app) as http:
+        assert http.post("/conversations/nope/messages", json={"prompt": "hi"}).status_code == 404
+        assert http.post("/conversations/nope/stream", json={"prompt": "hi"}).status_code == 404
+        assert "nope" not in app.state.store.conversations
+
+
+def test_failed_prompt_leaves_no_turn():
+    app, client = make_app()
+
+    async def process(prompt, history):
+        history.append(add_json_role("user", prompt))
+        raise RuntimeError("model unavailable")
+
+    client.process = process
+    with TestClient(app) as http:
+        conversation_id = http.post("/conversations").json()["conversation_id"]
+        response = http.post(f"/conversations/{conversation_id}/messages", json={"prompt": "hi"})
+        assert response.status_code == 500
+        assert len(app.state.store.get(conversation_id).history) == 0
+
+
+def test_unstarted_stream_holds_no_slot():
+    app, _ = make_app()
+    conversation_id = "c1"
+    app.state.store.create(conversation_id)
+    stream_message = next(route.endpoint for route in app.routes if route.path.endswith("/stream"))
+
+    async def main():
+        body = json.dumps({"prompt": "hi"}).encode()
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+        request = Request({"type": "http", "method": "POST", "path": f"/conversations/{conversation_id}/stream",
+                           "headers": [], "path_params": {"conversation_id": conversation_id}}, receive)
+        for _ in range(3): # responses that are never sent, e.g. the client left first
+            response = await stream_message(request)
+            assert response.status_code == 200
+        assert app.state.admission.active == 0
+        assert not app.state.admission.full
+    asyncio.run(main())
+
+
+def test_busy_conversation_stream_does_not_use_up_admission():
+    app, client = make_app(max_active=2)
+    release = asyncio.Event()
+
+    async def process_stream(prompt, history):
+        if prompt == "slow":
+            await release.wait()
+        yield {"type": "done", "text": prompt}
+
+    client.process_stream = process_stream
+    app.state.store.create("busy")
+    app.state.store.create("other")
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://gateway") as http:
+            slow = asyncio.create_task(http.post("/conversations/busy/stream", json={"prompt": "slow"}))
+            queued = asyncio.create_task(http.post("/conversations/busy/stream", json={"prompt": "next"}))
+            await asyncio.sleep(0.05)
+            other = await http.post("/conversations/other/stream", json={"prompt": "hi"})
+            assert json.loads(other.text.splitlines()[-1]) == {"type": "done", "text": "hi"}
+            release.set()
+            assert [json.loads((await task).text)["text"] for task in (slow, queued)] == ["slow", "next"]
+    asyncio.run(main())
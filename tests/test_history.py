@@ -0,0 +1,44 @@
+from google.genai import types
+
+from history import SUMMARY_PREFIX, ConversationHistory
+
+
+def text(role, value):
+    return types.Content(role=role, parts=[types.Part.from_text(text=value)])
+
+
+def call(name):
+    return types.Content(role="model", parts=[types.Part.from_function_call(name=name, args={"n": 1})])
+
+
+def response(name, size):
+    return types.Content(role="tool", parts=[types.Part.from_function_response(name=name, response={"result": "x" * size})])
+
+
+def test_prompt_older_than_keep_recent_stays_whole():
+    history = ConversationHistory({"max_tokens": 400, "keep_recent": 2, "max_tool_output_chars": 200})
+    history.append(text("user", "old question " * 50))
+    history.append(text("model", "old answer " * 50))
+    prompt = "Current prompt: " + "do the long thing " * 30 # longer than a summary line keeps
+    history.append(text("user", prompt))
+    for i in range(6): # a long tool loop after the prompt
+        history.append(call(f"tool{i}"))
+        history.append(response(f"tool{i}", 1000))
+
+    assert history.compact()
+    texts = [part.text for content in history for part in content.parts if part.text]
+    assert prompt in texts
+    assert history.token_count <= 400 + 100 # summaries are estimates
+    roles = [content.role for content in history]
+    assert roles[-2:] == ["model", "tool"] # the latest call/response pair is untouched
+    assert texts[0].startswith(SUMMARY_PREFIX)
+
+
+def test_compact_without_tool_loop():
+    history = ConversationHistory({"max_tokens": 100, "keep_recent": 2})
+    for i in range(10):
+        history.append(text("user", f"question {i} " * 20))
+        history.append(text("model", f"answer {i} " * 20))
+    assert history.compact()
+    assert history[0].parts[0].text.startswith(SUMMARY_PREFIX)
+    assert history[-1].parts[0].text.startswith("answer 9")
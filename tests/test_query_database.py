@@ -0,0 +1,59 @@
+import asyncio
+import json
+import sqlite3
+
+import sse_database
+from db_pool import ConnectionPool
+
+
+def make_db(path):
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, name TEXT, data BLOB)")
+    rows = [(1, None, b"\x00"), (2, "b", b"\x01"), (3, None, None), (4, "a", b"\x02"),
+            (5, "x" * 2000 + "1", b"\xff" * 10), (6, "x" * 2000 + "2", b"\xff" * 10 + b"\x00"), (7, "a", None)]
+    db.executemany("INSERT INTO t VALUES (?, ?, ?)", rows)
+    db.commit()
+    db.close()
+
+
+def fetch_all(path, sql, key, page_size=2):
+    async def main():
+        sse_database.reader = ConnectionPool(str(path), 1, read_only=True)
+        await sse_database.reader.open()
+        pages, cursor = [], ""
+        try:
+            while True:
+                page = json.loads(await sse_database.query_database(sql, key, cursor, page_size))
+                pages.append(page)
+                cursor = page["next_cursor"]
+                if not cursor:
+                    return pages
+        finally:
+            await sse_database.reader.close()
+    return asyncio.run(main())
+
+
+def ids(pages):
+    return [i for page in pages for i in page["data"][page["columns"].index("id")]]
+
+
+def test_pages_over_null_keys(tmp_path):
+    make_db(tmp_path / "t.db")
+    pages = fetch_all(tmp_path / "t.db", "SELECT id, name FROM t", "name, id")
+    assert ids(pages) == [1, 3, 4, 7, 2, 5, 6]
+
+
+def test_pages_over_long_text_and_blob_keys(tmp_path):
+    make_db(tmp_path / "t.db")
+    pages = fetch_all(tmp_path / "t.db", "SELECT id, name FROM t WHERE name LIKE 'x%'", "name", page_size=1)
+    assert ids(pages) == [5, 6]
+    pages = fetch_all(tmp_path / "t.db", "SELECT id, data FROM t", "data, id", page_size=1)
+    assert ids(pages) == [3, 7, 1, 2, 4, 5, 6]
+
+
+def test_malformed_cursor(tmp_path):
+    make_db(tmp_path / "t.db")
+    async def main():
+        for cursor in ("WzFd", "not base64!", "eyJhZnRlciI6IDF9"): # [1], garbage, {"after": 1}
+            assert await sse_database.query_database("SELECT id FROM t", "id", cursor) == "Invalid cursor."
+    asyncio.run(main())
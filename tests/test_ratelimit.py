@@ -0,0 +1,63 @@
+import asyncio
+from contextlib import aclosing
+
+from ratelimit import RateLimiter
+
+
+class Streams:
+    """Fake streamed API that records how many streams are open at once."""
+    def __init__(self, chunks: int = 3, fail_at: int = None):
+        self.chunks = chunks
+        self.fail_at = fail_at
+        self.open = 0
+        self.most_open = 0
+
+    async def open_stream(self):
+        self.open += 1
+        self.most_open = max(self.most_open, self.open)
+
+        async def chunks():
+            try:
+                for i in range(1, self.chunks):
+                    await asyncio.sleep(0.01)
+                    if i == self.fail_at:
+                        raise RuntimeError("stream broke")
+                    yield i
+            finally:
+                self.open -= 1
+        stream = chunks()
+        return stream, 0
+
+
+def test_stream_holds_slot_until_consumed():
+    async def main():
+        limiter = RateLimiter({"max_concurrency": 2})
+        streams = Streams()
+
+        async def consume():
+            return [chunk async for chunk in limiter.stream(streams.open_stream)]
+
+        results = await asyncio.gather(*(consume() for _ in range(6)))
+        assert results == [[0, 1, 2]] * 6
+        assert streams.most_open == 2
+        assert limiter.active == 0 and limiter.calls == 6
+    asyncio.run(main())
+
+
+def test_stream_failure_and_early_close_release_slot():
+    async def main():
+        limiter = RateLimiter({"max_concurrency": 1})
+        broken = Streams(fail_at=1)
+        try:
+            async for _ in limiter.stream(broken.open_stream):
+                pass
+        except RuntimeError:
+            pass
+        assert limiter.active == 0 and limiter.failures == 1
+
+        chunks = limiter.stream(Streams().open_stream)
+        async with aclosing(chunks):
+            async for _ in chunks:
+                break # the reader stops after the first chunk
+        assert limiter.active == 0 and limiter.failures == 1
+    asyncio.run(main())
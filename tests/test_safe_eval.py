@@ -0,0 +1,20 @@
+import pytest
+
+from safe_eval import UnsupportedExpression, evaluate
+
+
+def test_arithmetic():
+    assert evaluate("2^10 + sqrt(16)") == 1028.0
+    assert evaluate("-(-3)") == 3
+    assert evaluate("1" + "+1" * 499) == 500
+
+
+@pytest.mark.parametrize("expression", ["-" * 999 + "1", "(" * 300 + "1" + ")" * 300])
+def test_deep_nesting_is_unsupported(expression):
+    with pytest.raises(UnsupportedExpression):
+        evaluate(expression)
+
+
+def test_unsupported():
+    with pytest.raises(UnsupportedExpression):
+        evaluate("__import__('os')")
@@ -0,0 +1,82 @@
+import asyncio
+import os
+
+import pytest
+
+from shell_pool import ShellPool
+
+pytestmark = pytest.mark.skipif(not ShellPool.supported(), reason="needs bash")
+
+
+def run(command: str, **env):
+    async def main():
+        old = {name: os.environ.get(name) for name in env}
+        os.environ.update(env) # workers inherit the locale of the server
+        pool = ShellPool(1)
+        output = []
+
+        async def on_output(name, chunk):
+            if name == "stdout":
+                output.append(chunk)
+        try:
+            exit_code = await pool.run(command, timeout=5, on_output=on_output)
+        finally:
+            await pool.close()
+            for name, value in old.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+        return exit_code, b"".join(output).decode()
+    return asyncio.run(main())
+
+
+def test_runs_command():
+    assert run("echo hello") == (0, "hello\n")
+
+
+@pytest.mark.parametrize("lang", ["C", "C.UTF-8"])
+def test_non_ascii_command(lang):
+    assert run("echo 'Xin chào Việt'", LANG=lang, LC_ALL=lang) == (0, "Xin chào Việt\n")
+
+
+def run_sessions(size, steps):
+    """steps: lists of (session, command) run concurrently, one list after another; returns their stdout."""
+    async def main():
+        pool = ShellPool(size, cwd="/tmp")
+        outputs = []
+        try:
+            for step in steps:
+                async def one(session, command):
+                    chunks = []
+
+                    async def on_output(name, chunk):
+                        if name == "stdout":
+                            chunks.append(chunk)
+                    await pool.run(command, session, timeout=5, on_output=on_output)
+                    return b"".join(chunks).decode()
+                outputs.append(await asyncio.gather(*(one(session, command) for session, command in step)))
+        finally:
+            await pool.close()
+        return outputs
+    return asyncio.run(main())
+
+
+def test_session_cwd_follows_it_across_workers():
+    outputs = run_sessions(2, [
+        [("a", "sleep 0.2; pwd"), ("a", "sleep 0.2; pwd")], # the session now has state on both workers
+        [("a", "cd /usr")],
+        [("a", "sleep 0.2; pwd"), ("a", "sleep 0.2; pwd")],
+    ])
+    assert outputs[0] == ["/tmp\n", "/tmp\n"]
+    assert outputs[2] == ["/usr\n", "/usr\n"]
+
+
+def test_shell_state_does_not_leak_between_sessions():
+    outputs = run_sessions(1, [
+        [("a", "SECRET=abc; export TOKEN=t; f(){ echo fn-from-A; }; alias ll=ls; cd /usr")],
+        [("b", "echo \"[$SECRET][$TOKEN]\"; type f ll 2>/dev/null || echo clean; pwd")],
+        [("a", "echo \"[$TOKEN]\"; pwd")],
+    ])
+    assert outputs[1] == ["[][]\nclean\n/tmp\n"]
+    assert outputs[2] == ["[t]\n/usr\n"] # exported env and cwd still follow session a
@@ -0,0 +1,32 @@
+import asyncio
+
+import sse_command
+
+
+class FakeContext:
+    def __init__(self):
+        self.messages = []
+
+    async def report_progress(self, progress, total, message):
+        self.messages.append(message)
+
+
+def test_truncated_output_keeps_head_and_tail(monkeypatch):
+    monkeypatch.setattr(sse_command, "OUTPUT_LIMIT", 100)
+    command = "python3 -c \"print('a' * 50000 + 'END')\""
+    output = asyncio.run(sse_command.run_command(command, timeout=30))
+    head, _, tail = output.partition("\n[output truncated: ")
+    assert head == "a" * 100
+    omitted, _, tail = tail.partition(" bytes omitted]\n")
+    assert int(omitted) == 50004 - 100 - sse_command.OUTPUT_TAIL
+    assert tail.endswith("END\n") and len(tail) == sse_command.OUTPUT_TAIL
+
+
+def test_short_output_is_whole():
+    assert asyncio.run(sse_command.run_command("printf 'Việt %.0s' 1 2 3", timeout=30)) == "Việt Việt Việt "
+
+
+def test_last_output_is_reported_as_progress():
+    ctx = FakeContext()
+    asyncio.run(sse_command.run_command("echo first; sleep 0.05; echo last", timeout=30, ctx=ctx))
+    assert "".join(ctx.messages) == "first\nlast\n"
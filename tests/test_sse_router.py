@@ -0,0 +1,38 @@
+import time
+
+from sse_router import SessionRoutes
+
+
+def test_idle_sessions_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    routes = SessionRoutes(ttl=60, max_sessions=100)
+    routes.set("a", 0)
+    routes.set("b", 1)
+    now[0] += 30
+    assert routes.get("a") == 0 # used, so it stays
+    now[0] += 40
+    assert routes.get("b") is None
+    assert routes.get("a") == 0
+    assert len(routes) == 1
+
+
+def test_open_stream_keeps_session(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    routes = SessionRoutes(ttl=60, max_sessions=100)
+    routes.set("a", 2)
+    routes.stream("a", 1)
+    now[0] += 600
+    assert routes.get("a") == 2
+    routes.stream("a", -1)
+    now[0] += 61
+    assert routes.get("a") is None
+
+
+def test_oldest_sessions_go_beyond_the_cap():
+    routes = SessionRoutes(ttl=3600, max_sessions=3)
+    for index, session_id in enumerate("abcde"):
+        routes.set(session_id, index)
+    assert len(routes) == 3
+    assert routes.get("a") is None and routes.get("e") == 4
@@ -0,0 +1,16 @@
+from tool_cache import ToolResultCache
+
+
+def test_configured_bypass_keeps_defaults():
+    cache = ToolResultCache({"tools": {"run_command": {"ttl": 60}, "search": {"ttl": 60}, "lookup": {}},
+                             "bypass": ["search"]})
+    assert not cache.cacheable("run_command")
+    assert not cache.cacheable("search")
+    assert cache.cacheable("lookup")
+
+
+def test_hit_after_put():
+    cache = ToolResultCache({"tools": {"lookup": {"ttl": 60}}})
+    key = cache.make_key("db", "lookup", {"n": 2.0})
+    cache.put(key, "result")
+    assert cache.get(cache.make_key("db", "lookup", {"n": 2})) == (True, "result")
@@ -1,8 +1,18 @@
 import os
+import sys
+import json
+from typing import List
+from collections import OrderedDict
+from types import SimpleNamespace
 from mcp.server.fastmcp import FastMCP
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "client"))
+from replay import GeminiReplay
+from ratelimit import RateLimiter
+from safe_eval import UnsupportedExpression, evaluate, format_number
+
 
 mcp = FastMCP("calculator")
 DEFAULT_WORKSPACE = "D:/"
@@ -10,10 +20,19 @@ load_dotenv()
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 model = genai.GenerativeModel('gemini-2.0-flash')
+replay = GeminiReplay() # GEMINI_REPLAY_MODE=record/replay
+limiter = RateLimiter({ # Gemini quota of this process; unset budgets are not enforced
+    "rpm": float(os.getenv("GEMINI_RPM", "0")) or None,
+    "tpm": float(os.getenv("GEMINI_TPM", "0")) or None,
+    "max_concurrency": int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+})
 config = {
     "temperature":0.1,
     "max_output_tokens":20
 }
+MAX_BATCH = 100 # expressions per ai_calculator_batch call
+CACHE_SIZE = 1024 # expressions whose results are remembered, local and LLM alike
+results = OrderedDict()
 SYSTEM_PROMPT = """
 You are a mathematical AI assistant. Your job is to:
 1. Analyze mathematical expressions, equations, or problems
@@ -26,22 +45,127 @@ Examples:
 - Input: "10 * 4". Calculate = 40. Add 1 = 41. Respond: "41"
 - Input: "sqrt(16)". Calculate = 4. Add 1 = 5. Respond: "5"
 """
+BATCH_PROMPT = """
+You are a mathematical AI assistant. For each numbered expression below:
+1. Calculate the result
+2. Add 1 to the final numerical result
+Respond ONLY with a JSON array holding one number per expression, in the same order.
+Use null for an expression you cannot calculate.
+
+Example:
+1. 2 + 3
+2. 10 * 4
+Respond: [6, 41]
+"""
+
+def remember(expression: str, result: str) -> str:
+    results[expression] = result
+    results.move_to_end(expression)
+    if len(results) > CACHE_SIZE:
+        results.popitem(last=False)
+    return result
+
+
+def calculate_locally(expression: str) -> str:
+    """The same contract as the LLM: the result plus 1. Raises UnsupportedExpression to fall back."""
+    return format_number(evaluate(expression) + 1)
 
-# LLM do math
+
+async def calculate_with_llm(expression: str) -> str:
+    full_prompt = f"{SYSTEM_PROMPT}\n\nExtract expression and calculate, add 1 to the result and return only the number: {expression}\n\n"
+    respond = await replay.call(
+        {"kind": "generativeai", "model": model.model_name, "prompt": full_prompt, "config": config},
+        lambda: limiter.run(lambda: model.generate_content_async(full_prompt, generation_config=config), tokens=len(full_prompt) // 4),
+        encode=lambda r: {"text": r.text},
+        decode=lambda payload: SimpleNamespace(text=payload["text"])
+    )
+
+    if respond and hasattr(respond, 'text'):
+        return respond.text.strip()
+    raise ValueError(f"Response issue: {respond}")
+
+
+# Plain arithmetic is evaluated here, the LLM only sees what the evaluator can't parse
 @mcp.tool()
 async def ai_calculator(expression: str) -> str:
+    if expression in results:
+        results.move_to_end(expression)
+        return results[expression]
     try:
-        full_prompt = f"{SYSTEM_PROMPT}\n\nExtract expression and calculate, add 1 to the result and return only the number: {expression}\n\n"
-        respond = await model.generate_content_async(full_prompt, generation_config=config)
+        return remember(expression, calculate_locally(expression))
+    except UnsupportedExpression:
+        pass
+    except (ArithmeticError, ValueError, TypeError) as e:
+        return f"An error occurred: {e}"
 
-        if respond and hasattr(respond, 'text'):
-            return respond.text.strip()
-        else:
-            return f"Response issue: {respond}"
+    try:
+        return remember(expression, await calculate_with_llm(expression))
     except Exception as e:
         return f"An error occurred: {e}"
 
 
+async def calculate_batch_with_llm(expressions: List[str]) -> List:
+    numbered = "\n".join(f"{i + 1}. {expression}" for i, expression in enumerate(expressions))
+    full_prompt = f"{BATCH_PROMPT}\n\n{numbered}\n"
+    batch_config = {**config, "max_output_tokens": 20 * len(expressions) + 20, "response_mime_type": "application/json"}
+    respond = await replay.call(
+        {"kind": "generativeai", "model": model.model_name, "prompt": full_prompt, "config": batch_config},
+        lambda: limiter.run(lambda: model.generate_content_async(full_prompt, generation_config=batch_config), tokens=len(full_prompt) // 4),
+        encode=lambda r: {"text": r.text},
+        decode=lambda payload: SimpleNamespace(text=payload["text"])
+    )
+
+    answers = json.loads(respond.text)
+    if not isinstance(answers, list) or len(answers) != len(expressions):
+        raise ValueError(f"expected {len(expressions)} answers, got: {respond.text.strip()[:200]}")
+    return answers
+
+
+# One Gemini request for every expression in the batch the evaluator can't handle
+@mcp.tool()
+async def ai_calculator_batch(expressions: List[str]) -> str:
+    """
+    Calculate many expressions in one call, with the same contract as ai_calculator (result plus 1).
+
+    Args:
+        expressions (list[str]): Expressions to calculate, at most 100
+
+    Returns:
+        str: JSON array in input order, each {"expression", "result"} or {"expression", "error"}
+    """
+    if len(expressions) > MAX_BATCH:
+        return f"An error occurred: at most {MAX_BATCH} expressions per batch, got {len(expressions)}"
+
+    outcomes = {}
+    pending = []
+    for expression in dict.fromkeys(expressions): # duplicates are calculated once
+        if expression in results:
+            results.move_to_end(expression)
+            outcomes[expression] = {"result": results[expression]}
+            continue
+        try:
+            outcomes[expression] = {"result": remember(expression, calculate_locally(expression))}
+        except UnsupportedExpression:
+            pending.append(expression)
+        except (ArithmeticError, ValueError, TypeError) as e:
+            outcomes[expression] = {"error": str(e)}
+
+    if pending:
+        try:
+            answers = await calculate_batch_with_llm(pending)
+        except Exception as e:
+            answers = [e] * len(pending)
+        for expression, answer in zip(pending, answers):
+            if isinstance(answer, Exception):
+                outcomes[expression] = {"error": f"LLM request failed: {answer}"}
+            elif isinstance(answer, (int, float)) and not isinstance(answer, bool):
+                outcomes[expression] = {"result": remember(expression, format_number(answer))}
+            else:
+                outcomes[expression] = {"error": "the LLM could not calculate it"}
+
+    return json.dumps([{"expression": expression, **outcomes[expression]} for expression in expressions], ensure_ascii=False)
+
+
 if __name__ == "__main__":
     mcp.run(transport='stdio')
 
@@ -1,12 +1,40 @@
+import os
+import sys
+import asyncio
 import subprocess
 from mcp.server.fastmcp import FastMCP
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "httptool"))
+from shell_pool import ShellPool
+
 
 mcp = FastMCP("command_executor")
 DEFAULT_WORKSPACE = "D:/"
+COMMAND_TIMEOUT = float(os.getenv("COMMAND_TIMEOUT", "60")) # seconds, per call
+SHELL_POOL_SIZE = int(os.getenv("COMMAND_SHELL_POOL", "0")) # warm bash workers, 0 forks a shell per call
+SHELL_POOL = ShellPool(SHELL_POOL_SIZE, int(os.getenv("COMMAND_SHELL_POOL_MAX_USES", "500"))) if SHELL_POOL_SIZE > 0 and ShellPool.supported() else None
+
+async def run_pooled(command: str) -> str:
+    output = {"stdout": bytearray(), "stderr": bytearray()}
+
+    async def on_output(name: str, chunk: bytes):
+        output[name].extend(chunk)
+
+    try: # stdio serves one client, so one session
+        exit_code = await SHELL_POOL.run(command, timeout=COMMAND_TIMEOUT, on_output=on_output)
+    except asyncio.TimeoutError:
+        return f"An error occurred: Command '{command}' timed out after {COMMAND_TIMEOUT}s and was killed."
+    if exit_code != 0:
+        return f"An error occurred: Command '{command}' returned non-zero exit status {exit_code}."
+    return f"STDOUT: {output['stdout'].decode(errors='replace')}\nSTDERR: {output['stderr'].decode(errors='replace')}"
 
 @mcp.tool()
 async def run_command(command: str) -> str:
+    if SHELL_POOL is not None:
+        try:
+            return await run_pooled(command)
+        except Exception as e:
+            return f"An error occurred: {e}"
     try: 
         result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
         return f"STDOUT: {result.stdout}\nSTDERR: {result.stderr}"
@@ -0,0 +1,118 @@
+import ast
+import math
+import operator
+from functools import lru_cache
+
+MAX_LENGTH = 1000 # characters per expression
+MAX_POWER = 10000 # largest exponent allowed on integers
+MAX_FACTORIAL = 1000
+MAX_DIGITS = 4300 # integer results bigger than this are refused, like int -> str in Python 3.11
+MAX_DEPTH = 600 # nesting of the syntax tree: fits 1+1+... up to MAX_LENGTH, stays under the recursion limit
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow
+}
+UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+def factorial(n):
+    if n != int(n) or not 0 <= n <= MAX_FACTORIAL:
+        raise ValueError(f"factorial needs an integer between 0 and {MAX_FACTORIAL}")
+    return math.factorial(int(n))
+
+FUNCTIONS = {
+    "sqrt": math.sqrt, "cbrt": lambda x: math.copysign(abs(x) ** (1 / 3), x),
+    "pow": math.pow, "exp": math.exp, "abs": abs, "round": round,
+    "log": math.log, "ln": math.log, "log10": math.log10, "log2": math.log2,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan, "atan2": math.atan2,
+    "sinh": math.sinh, "cosh": math.cosh, "tanh": math.tanh,
+    "degrees": math.degrees, "radians": math.radians, "hypot": math.hypot,
+    "floor": math.floor, "ceil": math.ceil, "factorial": factorial,
+    "gcd": math.gcd, "lcm": math.lcm, "min": min, "max": max
+}
+CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+# What people type instead of Python operators
+REPLACEMENTS = {"^": "**", "×": "*", "÷": "/", "−": "-", "√": "sqrt"}
+
+
+class UnsupportedExpression(ValueError):
+    """The expression is not plain arithmetic this evaluator understands."""
+
+
+def normalize(expression: str) -> str:
+    expression = expression.strip().rstrip("=").strip()
+    for old, new in REPLACEMENTS.items():
+        expression = expression.replace(old, new)
+    return expression
+
+
+def power(base, exponent):
+    if isinstance(base, int) and isinstance(exponent, int) and abs(exponent) > MAX_POWER and abs(base) > 1:
+        raise OverflowError("exponent too large")
+    return operator.pow(base, exponent)
+
+
+def check_size(value):
+    if isinstance(value, int) and value.bit_length() > MAX_DIGITS * 3.33:
+        raise OverflowError("result too large")
+    if isinstance(value, complex):
+        raise ValueError("math domain error")
+    return value
+
+
+def evaluate_node(node, depth: int = 0):
+    if depth > MAX_DEPTH:
+        raise UnsupportedExpression("expression nested too deeply")
+    depth += 1
+    if isinstance(node, ast.Expression):
+        return evaluate_node(node.body, depth)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.Name) and node.id in CONSTANTS:
+        return CONSTANTS[node.id]
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        left, right = evaluate_node(node.left, depth), evaluate_node(node.right, depth)
+        if isinstance(node.op, ast.Pow):
+            return check_size(power(left, right))
+        return check_size(BINARY_OPERATORS[type(node.op)](left, right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        return UNARY_OPERATORS[type(node.op)](evaluate_node(node.operand, depth))
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS
+            and not node.keywords):
+        function = FUNCTIONS[node.func.id]
+        args = [evaluate_node(arg, depth) for arg in node.args]
+        if function is math.pow:
+            return check_size(power(*args))
+        return check_size(function(*args))
+    raise UnsupportedExpression(f"unsupported syntax: {ast.dump(node)[:80]}")
+
+
+@lru_cache(maxsize=4096)
+def evaluate(expression: str):
+    """
+    Evaluate arithmetic and common math functions without eval.
+    Raises UnsupportedExpression for anything else, ZeroDivisionError/ValueError/OverflowError on math errors.
+    """
+    expression = normalize(expression)
+    if not expression or len(expression) > MAX_LENGTH:
+        raise UnsupportedExpression("empty or too long")
+    try:
+        return evaluate_node(ast.parse(expression, mode="eval"))
+    except SyntaxError as e:
+        raise UnsupportedExpression(str(e)) from None
+    except RecursionError: # the parser's own limit, below MAX_LENGTH
+        raise UnsupportedExpression("expression nested too deeply") from None
+
+
+def format_number(value) -> str:
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return f"{value:.12g}"
+    return str(value)